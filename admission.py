@@ -0,0 +1,110 @@
+import threading
+
+
+class Overloaded(RuntimeError):
+    pass
+
+
+class Superseded(RuntimeError):
+    pass
+
+
+class _Ticket:
+    def __init__(self, client):
+        self.client = client
+        self.state = "waiting"  # waiting -> running, or superseded
+        self.event = threading.Event()
+
+
+class _Stream:
+    def __init__(self):
+        self.running = None
+        self.waiting = None
+
+
+class AdmissionControl:
+    """Latest-frame-wins admission for per-client frame streams.
+
+    Each client has at most one frame in flight and one waiting behind it.
+    A newer frame replaces the waiting one, which is answered as
+    superseded, so a client that falls behind always gets its freshest
+    frame processed next. `max_queue` caps admitted frames across all
+    clients (0 disables the cap); beyond it admit() raises Overloaded.
+    """
+
+    def __init__(self, max_queue=64):
+        self.max_queue = max_queue
+        self._streams = {}
+        self._admitted = 0
+        self._lock = threading.Lock()
+        self._counters = {"admitted": 0, "superseded": 0, "rejected": 0, "timed_out": 0}
+
+    def admit(self, client):
+        with self._lock:
+            stream = self._streams.get(client)
+            replaced = stream.waiting if stream is not None else None
+            if self.max_queue and replaced is None and self._admitted >= self.max_queue:
+                self._counters["rejected"] += 1
+                raise Overloaded("Too many frames queued")
+            if stream is None:
+                stream = self._streams[client] = _Stream()
+
+            ticket = _Ticket(client)
+            self._counters["admitted"] += 1
+            if replaced is not None:
+                replaced.state = "superseded"
+                replaced.event.set()
+                self._counters["superseded"] += 1
+            else:
+                self._admitted += 1
+            if stream.running is None:
+                ticket.state = "running"
+                stream.running = ticket
+                ticket.event.set()
+            else:
+                stream.waiting = ticket
+            return ticket
+
+    def wait(self, ticket, timeout=None):
+        """Block until the ticket may run. Raises Superseded if a newer
+        frame from the same client replaced it, Overloaded on timeout."""
+        ticket.event.wait(timeout)
+        with self._lock:
+            if ticket.state == "running":
+                return
+            if ticket.state == "waiting":
+                # Gave up waiting: drop it so the client's next frame takes its place
+                stream = self._streams[ticket.client]
+                stream.waiting = None
+                ticket.state = "superseded"
+                self._admitted -= 1
+                self._counters["timed_out"] += 1
+                raise Overloaded("Timed out waiting for the previous frame")
+        raise Superseded("A newer frame from this client replaced this one")
+
+    def release(self, ticket):
+        with self._lock:
+            stream = self._streams.get(ticket.client)
+            if stream is None or stream.running is not ticket:
+                return
+            self._admitted -= 1
+            stream.running = stream.waiting
+            stream.waiting = None
+            if stream.running is not None:
+                stream.running.state = "running"
+                stream.running.event.set()
+            else:
+                del self._streams[ticket.client]
+
+    def pending(self):
+        with self._lock:
+            return self._admitted
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_queue": self.max_queue,
+                "queued": self._admitted,
+                "streams": len(self._streams),
+                **self._counters
+            }
@@ -0,0 +1,210 @@
+"""Search CPU thread settings for the inference path and remember the best.
+
+    python autotune.py --images field_frames/ --max-p95-ms 400
+
+Each candidate starts an inference pool with `workers` processes, each
+pinned to `threads` intra-op threads, `inter_threads` inter-op threads and
+`cv2_threads` OpenCV threads, and drives it with concurrent single-frame
+requests (the /detect path) so every worker stays busy. Like /detect,
+each request first decodes a JPEG in this process with `cv2_threads`
+OpenCV threads, which the server then also uses. The first pass
+sweeps worker counts and intra-op threads; the second refines inter-op and
+OpenCV threads around the best point. The winner is the highest throughput
+whose p95 latency stays within `max_p95_ms`, or the lowest p95 if none do.
+
+Results are stored in the model cache under a key for this machine (host,
+CPU, core count), backend, weights and input size, so later starts reuse
+them. The server runs this at startup with FAW_AUTOTUNE=1.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import platform
+import threading
+import time
+
+import cv2
+
+from backends import BACKENDS, weights_hash
+from benchmarking import load_images, percentile
+from decoding import ImageDecoder
+from worker_pool import InferencePool
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 8
+CLIENTS_PER_WORKER = 2
+
+
+def machine_key(backend_kwargs):
+    parts = [platform.node(), platform.machine(), platform.processor(), str(os.cpu_count()),
+             backend_kwargs["name"], weights_hash(backend_kwargs["weights"]), str(backend_kwargs["imgsz"])]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+
+
+def result_path(backend_kwargs):
+    return os.path.join(backend_kwargs.get("cache_dir", "model_cache"), f"autotune-{machine_key(backend_kwargs)}.json")
+
+
+def candidate_grid(cpus, max_workers=MAX_WORKERS):
+    configs = []
+    workers = 1
+    while workers <= min(cpus, max_workers):
+        per_worker = max(1, cpus // workers)
+        for threads in sorted({per_worker, max(1, per_worker // 2)}, reverse=True):
+            configs.append({"workers": workers, "threads": threads, "inter_threads": 1, "cv2_threads": 1})
+        workers *= 2
+    return configs
+
+
+def refinements(config):
+    configs = []
+    for inter_threads in (2, 4):
+        if inter_threads <= config["threads"]:
+            configs.append(dict(config, inter_threads=inter_threads))
+    if config["threads"] > 1:
+        configs.append(dict(config, cv2_threads=config["threads"]))
+    return configs
+
+
+def measure(backend_kwargs, config, images, frames):
+    # Requests arrive as JPEGs and are decoded on the request threads
+    payloads = [cv2.imencode(".jpg", img)[1].tobytes() for img in images]
+    decoder = ImageDecoder(target_size=backend_kwargs["imgsz"])
+    cv2.setNumThreads(config["cv2_threads"])
+    pool = InferencePool(dict(backend_kwargs, inter_threads=config["inter_threads"]),
+                         config["workers"],
+                         threads=config["threads"],
+                         inter_threads=config["inter_threads"],
+                         cv2_threads=config["cv2_threads"]).start()
+    try:
+        # One warm-up frame per worker
+        warmup = [threading.Thread(target=pool.predict, args=([images[0]],)) for _ in range(config["workers"])]
+        for thread in warmup:
+            thread.start()
+        for thread in warmup:
+            thread.join()
+
+        latencies = []
+        decode_ms = []
+        remaining = iter(range(frames))
+        lock = threading.Lock()
+
+        def client():
+            while True:
+                with lock:
+                    i = next(remaining, None)
+                if i is None:
+                    return
+                start = time.perf_counter()
+                img = decoder.decode(payloads[i % len(payloads)])
+                decoded = time.perf_counter()
+                pool.predict([img])
+                with lock:
+                    decode_ms.append((decoded - start) * 1000.0)
+                    latencies.append((time.perf_counter() - start) * 1000.0)
+
+        clients = [threading.Thread(target=client) for _ in range(config["workers"] * CLIENTS_PER_WORKER)]
+        start = time.perf_counter()
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        wall = time.perf_counter() - start
+    finally:
+        pool.close()
+
+    return {
+        "config": config,
+        "fps": round(frames / wall, 2),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "decode_p50_ms": round(percentile(decode_ms, 50), 1)
+    }
+
+
+def choose(results, max_p95_ms):
+    acceptable = [r for r in results if not max_p95_ms or r["p95_ms"] <= max_p95_ms]
+    if acceptable:
+        return max(acceptable, key=lambda r: r["fps"])
+    return min(results, key=lambda r: r["p95_ms"])
+
+
+def tune(backend_kwargs, images, frames=48, max_p95_ms=0, max_workers=MAX_WORKERS):
+    results = []
+
+    def run(configs):
+        for config in configs:
+            try:
+                result = measure(backend_kwargs, config, images, frames)
+            except Exception as e:
+                logger.error(f"Autotune candidate {config} failed: {e}")
+                continue
+            logger.info(f"Autotune {config}: {result['fps']} fps, p95 {result['p95_ms']} ms")
+            results.append(result)
+
+    run(candidate_grid(os.cpu_count() or 1, max_workers))
+    if not results:
+        raise RuntimeError("No autotune candidate could run")
+    run(refinements(choose(results, max_p95_ms)["config"]))
+    return choose(results, max_p95_ms), results
+
+
+def load_or_tune(backend_kwargs, images, force=False, **kwargs):
+    """Thread configuration for this machine: the stored one if present,
+    otherwise the result of a fresh search, which is then stored."""
+    path = result_path(backend_kwargs)
+    if not force and os.path.exists(path):
+        with open(path) as f:
+            record = json.load(f)
+        logger.info(f"Using autotuned configuration from {path}: {record['best']['config']}")
+        return record["best"]["config"]
+
+    best, results = tune(backend_kwargs, images, **kwargs)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    record = {
+        "machine": {"host": platform.node(), "cpu": platform.processor() or platform.machine(),
+                    "cpu_count": os.cpu_count()},
+        "backend": backend_kwargs["name"],
+        "weights": backend_kwargs["weights"],
+        "imgsz": backend_kwargs["imgsz"],
+        "max_p95_ms": kwargs.get("max_p95_ms", 0),
+        "tuned_at": time.time(),
+        "best": best,
+        "results": results
+    }
+    with open(path, "w") as f:
+        json.dump(record, f, indent=2)
+    logger.info(f"Autotuned configuration {best['config']} saved to {path}")
+    return best["config"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", default="best.pt")
+    parser.add_argument("--images", help="Directory of sample frames (random frames if omitted)")
+    parser.add_argument("--limit", type=int, default=16, help="Max number of frames to use")
+    parser.add_argument("--frames", type=int, default=48, help="Requests per candidate")
+    parser.add_argument("--backend", default="torch", choices=BACKENDS)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.5)
+    parser.add_argument("--iou", type=float, default=0.5)
+    parser.add_argument("--max-p95-ms", type=float, default=0, help="Latency budget (0 for none)")
+    parser.add_argument("--max-workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--cache-dir", default="model_cache")
+    parser.add_argument("--force", action="store_true", help="Search again even if a stored result exists")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    backend_kwargs = {"name": args.backend, "weights": args.weights, "imgsz": args.imgsz, "conf": args.conf,
+                      "iou": args.iou, "cache_dir": args.cache_dir}
+    images = load_images(args.images, args.limit, args.imgsz)
+    config = load_or_tune(backend_kwargs, images, force=args.force, frames=args.frames,
+                          max_p95_ms=args.max_p95_ms, max_workers=args.max_workers)
+    print(json.dumps(config))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import ast
+import glob
+import hashlib
+import logging
+import os
+import shutil
+from concurrent.futures import Future
+
+import cv2
+import numpy as np
+
+from inference import EMPTY_DETECTIONS, results_to_array
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "onnx-int8", "openvino")
+INT8_SUFFIX = "-int8.onnx"
+
+# Same limits ultralytics applies in its NMS
+MAX_DETECTIONS = 300
+MAX_WH = 7680
+LETTERBOX_COLOR = 114
+
+
+def weights_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def artifact_path(weights, imgsz, cache_dir, suffix):
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    return os.path.join(cache_dir, f"{stem}-{weights_hash(weights)}-{imgsz}{suffix}")
+
+
+def cached_export(weights, fmt, imgsz, cache_dir, suffix, **export_kwargs):
+    """Export `weights` with ultralytics once and keep the artifact in
+    `cache_dir`, keyed by the weights' content hash and image size."""
+    os.makedirs(cache_dir, exist_ok=True)
+    target = artifact_path(weights, imgsz, cache_dir, suffix)
+    if os.path.exists(target):
+        logger.info(f"Using cached {fmt} model {target}")
+        return target
+
+    from ultralytics import YOLO
+    logger.info(f"Exporting {weights} to {fmt} (imgsz={imgsz}), this only happens once per weights file")
+    exported = YOLO(weights).export(format=fmt, imgsz=imgsz, **export_kwargs)
+    shutil.move(str(exported), target)
+    return target
+
+
+def nms(xyxy, scores, cls, conf, iou):
+    """Class-aware NMS; returns the kept indices, highest score first."""
+    # Offset boxes per class so boxes of different classes never overlap
+    xywh = np.concatenate([xyxy[:, :2] + cls[:, None] * MAX_WH, xyxy[:, 2:] - xyxy[:, :2]], axis=1)
+    idx = cv2.dnn.NMSBoxes(xywh.tolist(), scores.tolist(), conf, iou, top_k=MAX_DETECTIONS)
+    return np.asarray(idx, dtype=np.int64).reshape(-1)[:MAX_DETECTIONS]
+
+
+def letterbox(img, size):
+    h, w = img.shape[:2]
+    gain = min(size / h, size / w)
+    new_h, new_w = round(h * gain), round(w * gain)
+    if (new_h, new_w) != (h, w):
+        img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top = (size - new_h) // 2
+    left = (size - new_w) // 2
+    canvas = np.full((size, size, 3), LETTERBOX_COLOR, dtype=np.uint8)
+    canvas[top:top + new_h, left:left + new_w] = img
+    return canvas, gain, left, top
+
+
+def preprocess(images, size):
+    """BGR uint8 frames -> (B, 3, size, size) float32 RGB batch plus the
+    letterbox parameters needed to map boxes back."""
+    batch = np.empty((len(images), 3, size, size), dtype=np.float32)
+    metas = []
+    for i, img in enumerate(images):
+        canvas, gain, left, top = letterbox(img, size)
+        batch[i] = canvas[..., ::-1].transpose(2, 0, 1)
+        metas.append((gain, left, top, img.shape[:2]))
+    batch *= 1.0 / 255.0
+    return batch, metas
+
+
+def postprocess(output, metas, conf, iou):
+    """Decode raw YOLOv8 heads (B, 4 + nc, anchors) into per-image (N, 6)
+    [x1, y1, x2, y2, conf, cls] arrays in original-image pixels."""
+    detections = []
+    for pred, (gain, left, top, (h, w)) in zip(output.transpose(0, 2, 1), metas):
+        scores = pred[:, 4:]
+        cls = scores.argmax(axis=1)
+        score = scores[np.arange(len(cls)), cls]
+        keep = score > conf
+        if not keep.any():
+            detections.append(EMPTY_DETECTIONS)
+            continue
+
+        xywh, score, cls = pred[keep, :4], score[keep], cls[keep]
+        xyxy = np.empty_like(xywh)
+        xyxy[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+        xyxy[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+
+        idx = nms(xyxy, score, cls, conf, iou)
+        boxes = xyxy[idx]
+        boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - left) / gain).clip(0, w)
+        boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - top) / gain).clip(0, h)
+        detections.append(np.concatenate(
+            [boxes, score[idx, None], cls[idx, None]], axis=1).astype(np.float32))
+    return detections
+
+
+class TorchBackend:
+    name = "torch"
+    concurrency = 1
+
+    def __init__(self, weights, imgsz=640, conf=0.5, iou=0.5, threads=None, **_):
+        import torch
+        from ultralytics import YOLO
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.model = YOLO(weights)
+        self.names = self.model.names
+        self.infer_kwargs = {"imgsz": imgsz, "conf": conf, "iou": iou}
+
+    def predict(self, images):
+        results = self.model(images, verbose=False, **self.infer_kwargs)
+        return [results_to_array(r) for r in results]
+
+
+class OnnxBackend:
+    name = "onnx"
+    concurrency = 1
+
+    def __init__(self, weights, imgsz=640, conf=0.5, iou=0.5, threads=None, inter_threads=1,
+                 cache_dir="model_cache", quantized=False, **_):
+        import onnxruntime as ort
+
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+        if quantized:
+            # Produced offline by quantize.py for the same weights and imgsz
+            self.name = "onnx-int8"
+            self.path = artifact_path(weights, imgsz, cache_dir, INT8_SUFFIX)
+            if not os.path.exists(self.path):
+                raise FileNotFoundError(f"No INT8 model for {weights} at {self.path}, run `python quantize.py` first")
+        else:
+            self.path = cached_export(weights, "onnx", imgsz, cache_dir, ".onnx", dynamic=True, simplify=True)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # Inter-op threads only run independent graph branches in parallel mode
+        parallel = (inter_threads or 0) > 1
+        options.execution_mode = ort.ExecutionMode.ORT_PARALLEL if parallel else ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = threads or 0  # 0 lets ORT use all physical cores
+        options.inter_op_num_threads = inter_threads if parallel else 1
+        self.session = ort.InferenceSession(self.path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata["names"])
+
+    def predict(self, images):
+        batch, metas = preprocess(images, self.imgsz)
+        output = self.session.run(None, {self.input_name: batch})[0]
+        return postprocess(output, metas, self.conf, self.iou)
+
+
+class OpenVinoBackend:
+    """OpenVINO CPU backend compiled with the THROUGHPUT hint.
+
+    Every frame becomes its own async infer request; up to `concurrency`
+    requests run at once, so callers dispatching from several threads keep
+    the CPU streams busy while the next frames are still being decoded.
+    """
+    name = "openvino"
+
+    def __init__(self, weights, imgsz=640, conf=0.5, iou=0.5, threads=None, ov_requests=0,
+                 cache_dir="model_cache", **_):
+        import openvino as ov
+        import yaml
+
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+        self.path = cached_export(weights, "openvino", imgsz, cache_dir, "_openvino_model")
+
+        config = {"PERFORMANCE_HINT": "THROUGHPUT"}
+        if threads:
+            config["INFERENCE_NUM_THREADS"] = threads
+        core = ov.Core()
+        compiled = core.compile_model(glob.glob(os.path.join(self.path, "*.xml"))[0], "CPU", config)
+        self.concurrency = ov_requests or compiled.get_property("OPTIMAL_NUMBER_OF_INFER_REQUESTS")
+        self.requests = ov.AsyncInferQueue(compiled, self.concurrency)
+        self.requests.set_callback(self._on_done)
+
+        with open(os.path.join(self.path, "metadata.yaml")) as f:
+            self.names = yaml.safe_load(f)["names"]
+
+    @staticmethod
+    def _on_done(request, future):
+        try:
+            future.set_result(request.get_output_tensor(0).data.copy())
+        except Exception as e:
+            future.set_exception(e)
+
+    def predict(self, images):
+        pending = []
+        for img in images:
+            batch, metas = preprocess([img], self.imgsz)
+            future = Future()
+            # Blocks only while all infer requests are busy
+            self.requests.start_async({0: batch}, future)
+            pending.append((future, metas))
+        return [postprocess(future.result(), metas, self.conf, self.iou)[0] for future, metas in pending]
+
+
+def load_backend(name, weights, **kwargs):
+    if name == "torch":
+        backend = TorchBackend(weights, **kwargs)
+    elif name == "onnx":
+        backend = OnnxBackend(weights, **kwargs)
+    elif name == "onnx-int8":
+        backend = OnnxBackend(weights, quantized=True, **kwargs)
+    elif name == "openvino":
+        backend = OpenVinoBackend(weights, **kwargs)
+    else:
+        raise ValueError(f"Unknown inference backend '{name}', expected one of {', '.join(BACKENDS)}")
+    logger.info(f"Loaded {name} inference backend for {weights}")
+    return backend
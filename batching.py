@@ -0,0 +1,136 @@
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from queue import Queue, Empty
+
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32)
+QUEUE_WAIT_MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class BatchScheduler:
+    """Groups concurrently submitted frames into a single model call.
+
+    `infer_fn` receives a list of items and must return a list of results in
+    the same order. A batch is dispatched as soon as it holds `max_batch_size`
+    items or the oldest item has waited `max_wait_ms`. `workers` dispatcher
+    threads may have batches in flight at once (one per inference process).
+    """
+
+    def __init__(self, infer_fn, max_batch_size=8, max_wait_ms=10.0, workers=1):
+        self.infer_fn = infer_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.workers = max(1, int(workers))
+        self._queue = Queue()
+        self._threads = []
+        self._stopped = False
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_MS_BUCKETS)
+
+    def start(self, workers=None):
+        if workers is not None:
+            self.workers = max(1, int(workers))
+        if not self._threads:
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"batch-scheduler-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def stop(self):
+        """Stop the dispatchers; queued and later submissions fail."""
+        self._stopped = True
+        for _ in self._threads:
+            self._queue.put(None)
+
+    def submit(self, item):
+        if self._stopped:
+            raise RuntimeError("Batch scheduler is stopped")
+        future = Future()
+        self._queue.put((item, future, time.monotonic()))
+        return future
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "workers": self.workers,
+            "queue_depth": self.pending(),
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot()
+        }
+
+    def _fail_pending(self):
+        sentinels = 0
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except Empty:
+                break
+            if entry is None:
+                sentinels += 1
+            elif entry[1].set_running_or_notify_cancel():
+                entry[1].set_exception(RuntimeError("Batch scheduler is stopped"))
+        # Leave the other dispatchers their stop signal
+        for _ in range(sentinels):
+            self._queue.put(None)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    entry = self._queue.get_nowait()
+                else:
+                    entry = self._queue.get(timeout=remaining)
+            except Empty:
+                break
+            if entry is None:
+                # Stopping: hand the sentinel back so this thread exits next round
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                self._fail_pending()
+                return
+
+            # Drop requests whose caller already gave up
+            batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            dispatched_at = time.monotonic()
+            for _, _, enqueued_at in batch:
+                self.queue_wait_ms.observe((dispatched_at - enqueued_at) * 1000.0)
+            self.batch_sizes.observe(len(batch))
+
+            try:
+                outputs = self.infer_fn([item for item, _, _ in batch])
+                if len(outputs) != len(batch):
+                    raise RuntimeError(f"Expected {len(batch)} results, got {len(outputs)}")
+            except Exception as e:
+                logger.error(f"Batched inference error: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), output in zip(batch, outputs):
+                future.set_result(output)
@@ -0,0 +1,89 @@
+"""Compare per-frame latency and outputs of the inference backends.
+
+    python bench_backends.py --images field_frames/ --backends torch onnx
+
+Each backend runs the same frames at batch size 1 (the /detect path).
+Detections are compared against the first backend listed so an export that
+drifts from the torch model is easy to spot.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from backends import BACKENDS, load_backend
+from benchmarking import load_images, percentile
+
+
+def bench(backend, images, runs, warmup):
+    for img in images[:warmup]:
+        backend.predict([img])
+
+    latencies = []
+    outputs = []
+    for _ in range(runs):
+        outputs = []
+        for img in images:
+            start = time.perf_counter()
+            outputs.append(backend.predict([img])[0])
+            latencies.append((time.perf_counter() - start) * 1000.0)
+    return latencies, outputs
+
+
+def compare(reference, outputs):
+    count_mismatches = 0
+    max_box_delta = 0.0
+    max_conf_delta = 0.0
+    for ref, out in zip(reference, outputs):
+        if len(ref) != len(out):
+            count_mismatches += 1
+            continue
+        if len(ref) == 0:
+            continue
+        # Order by confidence so matching detections line up
+        ref = ref[np.argsort(-ref[:, 4])]
+        out = out[np.argsort(-out[:, 4])]
+        max_box_delta = max(max_box_delta, float(np.abs(ref[:, :4] - out[:, :4]).max()))
+        max_conf_delta = max(max_conf_delta, float(np.abs(ref[:, 4] - out[:, 4]).max()))
+    return count_mismatches, max_box_delta, max_conf_delta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", default="best.pt")
+    parser.add_argument("--images", help="Directory of sample frames (random frames if omitted)")
+    parser.add_argument("--limit", type=int, default=50, help="Max number of frames to use")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"], choices=BACKENDS)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.5)
+    parser.add_argument("--iou", type=float, default=0.5)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--cache-dir", default="model_cache")
+    args = parser.parse_args()
+
+    images = load_images(args.images, args.limit, args.imgsz)
+    print(f"Benchmarking {len(images)} frames x {args.runs} runs")
+
+    reference = None
+    rows = []
+    for name in args.backends:
+        backend = load_backend(name, args.weights, imgsz=args.imgsz, conf=args.conf, iou=args.iou,
+                               threads=args.threads, cache_dir=args.cache_dir)
+        latencies, outputs = bench(backend, images, args.runs, args.warmup)
+        if reference is None:
+            reference = outputs
+            diff = "reference"
+        else:
+            mismatches, box_delta, conf_delta = compare(reference, outputs)
+            diff = f"{mismatches} count mismatches, max box delta {box_delta:.1f}px, max conf delta {conf_delta:.3f}"
+        rows.append((name, np.mean(latencies), percentile(latencies, 50), percentile(latencies, 95), diff))
+
+    print(f"{'backend':<10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'fps':>8}  vs {args.backends[0]}")
+    for name, mean, p50, p95, diff in rows:
+        print(f"{name:<10}{mean:>10.1f}{p50:>10.1f}{p95:>10.1f}{1000.0 / mean:>8.1f}  {diff}")
+
+
+if __name__ == "__main__":
+    main()
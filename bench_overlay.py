@@ -0,0 +1,66 @@
+"""Compare the live view overlay renderer with ultralytics plot().
+
+    python bench_overlay.py --boxes 0 10 100
+
+Both draw the same random detections on the same frame; the timings cover
+drawing only (JPEG encoding is identical for both and left out).
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarking import percentile
+from inference import results_from_array
+from overlay import OverlayRenderer
+
+NAMES = {0: "infested", 1: "not_infested"}
+
+
+def random_detections(count, width, height, rng):
+    x1 = rng.uniform(0, width - 40, count)
+    y1 = rng.uniform(0, height - 40, count)
+    w = rng.uniform(20, 200, count)
+    h = rng.uniform(20, 200, count)
+    data = np.stack([x1, y1, np.minimum(x1 + w, width - 1), np.minimum(y1 + h, height - 1),
+                     rng.uniform(0.5, 1.0, count), rng.integers(0, 2, count)], axis=1)
+    return data.astype(np.float32)
+
+
+def time_ms(fn, runs, warmup):
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000.0)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boxes", type=int, nargs="+", default=[0, 10, 100])
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    renderer = OverlayRenderer()
+
+    print(f"{args.width}x{args.height} frame, {args.runs} runs")
+    print(f"{'boxes':>6}{'plot() p50':>12}{'plot() p95':>12}{'overlay p50':>13}{'overlay p95':>13}{'speedup':>9}")
+    for count in args.boxes:
+        data = random_detections(count, args.width, args.height, rng)
+        plot = time_ms(lambda: results_from_array(img, data, NAMES).plot(), args.runs, args.warmup)
+        overlay = time_ms(lambda: renderer.render(img, data), args.runs, args.warmup)
+        plot_p50, overlay_p50 = percentile(plot, 50), percentile(overlay, 50)
+        print(f"{count:>6}{plot_p50:>12.2f}{percentile(plot, 95):>12.2f}{overlay_p50:>13.2f}"
+              f"{percentile(overlay, 95):>13.2f}{plot_p50 / overlay_p50:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
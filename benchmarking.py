@@ -0,0 +1,25 @@
+"""Sample frames and latency statistics shared by the benchmark and tuning
+scripts (bench_backends.py, bench_overlay.py, autotune.py, quantize.py)
+and the server's startup autotuning."""
+import glob
+import os
+
+import cv2
+import numpy as np
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png")
+
+
+def load_images(path, limit, imgsz):
+    if path:
+        files = sorted(f for pattern in IMAGE_PATTERNS for f in glob.glob(os.path.join(path, pattern)))[:limit]
+        images = [img for img in (cv2.imread(f) for f in files) if img is not None]
+        if images:
+            return images
+        print(f"No readable images in {path}, falling back to random frames")
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (imgsz * 3 // 4, imgsz, 3), dtype=np.uint8) for _ in range(limit)]
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
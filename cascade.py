@@ -0,0 +1,86 @@
+import threading
+import time
+
+import numpy as np
+
+from metrics import Histogram
+from thumbnails import thumbnail
+
+CASCADE_MODES = ("off", "vegetation", "detector")
+THUMBNAIL_SIZE = (64, 64)
+LATENCY_MS_BUCKETS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class PlantGate:
+    """First stage of a two-stage cascade: decides cheaply whether a frame
+    shows any plants, so frames of sky, soil or the landing pad skip the
+    full detector.
+
+    `mode` "vegetation" thresholds the excess-green index (2G - R - B) of a
+    small thumbnail: a frame passes when at least `min_green` of its pixels
+    exceed `exg_threshold`. `mode` "detector" runs the probe passed to
+    check() (the model's weights at a small imgsz) and passes the frame if
+    it finds anything. Rejected frames get no detections.
+    """
+
+    def __init__(self, mode="off", min_green=0.02, exg_threshold=20, timeout=None):
+        if mode not in CASCADE_MODES:
+            raise ValueError(f"Unknown cascade mode {mode!r}, expected one of {CASCADE_MODES}")
+        self.mode = mode
+        self.min_green = min_green
+        self.exg_threshold = exg_threshold
+        self.timeout = timeout
+        self.gate_ms = Histogram(LATENCY_MS_BUCKETS)
+        self.detector_ms = Histogram(LATENCY_MS_BUCKETS)
+        self._checks = 0
+        self._rejects = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    def green_fraction(self, img):
+        small = thumbnail(img, THUMBNAIL_SIZE).astype(np.int16)
+        b, g, r = small[..., 0], small[..., 1], small[..., 2]
+        return float(np.count_nonzero(2 * g - r - b > self.exg_threshold)) / (THUMBNAIL_SIZE[0] * THUMBNAIL_SIZE[1])
+
+    def check(self, img, probe=None):
+        """True if the frame should go on to the full detector. In detector
+        mode without a probe (not loaded yet) every frame passes."""
+        start = time.monotonic()
+        if self.mode == "vegetation":
+            passed = self.green_fraction(img) >= self.min_green
+        elif probe is not None:
+            passed = len(probe.submit(img).result(timeout=self.timeout)) > 0
+        else:
+            passed = True
+        self.gate_ms.observe((time.monotonic() - start) * 1000.0)
+        with self._lock:
+            self._checks += 1
+            if not passed:
+                self._rejects += 1
+        return passed
+
+    def observe_detector(self, ms):
+        # Full-detector latency of passed frames, used to estimate savings
+        self.detector_ms.observe(ms)
+
+    def stats(self):
+        gate = self.gate_ms.snapshot()
+        detector = self.detector_ms.snapshot()
+        with self._lock:
+            checks, rejects = self._checks, self._rejects
+        return {
+            "mode": self.mode,
+            "min_green": self.min_green,
+            "exg_threshold": self.exg_threshold,
+            "checks": checks,
+            "rejects": rejects,
+            "reject_rate": rejects / checks if checks else 0.0,
+            # Detector time not spent on rejected frames, net of the time
+            # every frame spent in the gate
+            "saved_ms": rejects * detector["mean"] - gate["sum"],
+            "gate_ms": gate,
+            "detector_ms": detector
+        }
@@ -0,0 +1,55 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Collapses concurrent calls that share a key into one execution.
+
+    The first caller for a key (the leader) runs `fn`; callers arriving while
+    it is in flight wait for the same outcome, result or exception. The key
+    is released as soon as the leader finishes, so later calls run afresh
+    (the result cache covers repeats after that).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._leaders = 0
+        self._followers = 0
+
+    def do(self, key, fn, timeout=None):
+        """Returns (result, leader) where `leader` tells whether this call ran `fn`."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._leaders += 1
+            else:
+                self._followers += 1
+
+        if not leader:
+            return future.result(timeout=timeout), False
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, True
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            total = self._leaders + self._followers
+            return {
+                "in_flight": len(self._calls),
+                "executions": self._leaders,
+                "coalesced": self._followers,
+                "coalesced_rate": self._followers / total if total else 0.0
+            }
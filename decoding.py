@@ -0,0 +1,94 @@
+import struct
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from metrics import Histogram
+from raw_frames import is_raw, unpack_raw
+
+DECODE_MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500)
+REDUCED_FLAGS = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+# Start-of-frame markers carry the image size; C4, C8 and CC are other segments
+SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+SOF_SIZE = struct.Struct(">HH")
+
+
+def jpeg_size(data):
+    """(width, height) from a JPEG's start-of-frame header, or None if the
+    data is not a JPEG or the header cannot be found."""
+    if data[:2] != b"\xff\xd8":
+        return None
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker in SOF_MARKERS:
+            height, width = SOF_SIZE.unpack_from(data, i + 5)
+            return width, height
+        i += 2 + SOF_SIZE.unpack_from(data, i + 2)[0]
+    return None
+
+
+def reduction_factor(width, height, target_size):
+    # Largest DCT scaling that still leaves the longer side at target_size
+    for factor in (8, 4, 2):
+        if max(width, height) // factor >= target_size:
+            return factor
+    return 1
+
+
+class ImageDecoder:
+    """Request bodies to BGR images with no more pixels than the model uses.
+
+    Raw frames (see raw_frames) are wrapped without a codec. JPEGs whose
+    header size is at least twice `target_size` are decoded at 1/2, 1/4 or
+    1/8 scale in the DCT domain, so large stills never materialise at full
+    resolution; the longer side still ends up at or above `target_size`.
+    Callers that need every pixel (sliced inference) pass full=True.
+    """
+
+    def __init__(self, target_size=640, reduce=True):
+        self.target_size = target_size
+        self.reduce = reduce
+        self.decode_ms = Histogram(DECODE_MS_BUCKETS)
+        self._counters = {"raw": 0, "full": 0, "reduced_2": 0, "reduced_4": 0, "reduced_8": 0}
+        self._lock = threading.Lock()
+
+    def size(self, data):
+        """(width, height) known without decoding, or None."""
+        if is_raw(data):
+            return None
+        return jpeg_size(data)
+
+    def decode(self, data, full=False):
+        start = time.monotonic()
+        if is_raw(data):
+            img, kind = unpack_raw(data), "raw"
+        else:
+            factor = 1
+            size = jpeg_size(data) if self.reduce and not full else None
+            if size is not None:
+                factor = reduction_factor(*size, self.target_size)
+            flag = REDUCED_FLAGS[factor] if factor > 1 else cv2.IMREAD_COLOR
+            img = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+            kind = f"reduced_{factor}" if factor > 1 else "full"
+        self.decode_ms.observe((time.monotonic() - start) * 1000.0)
+        with self._lock:
+            self._counters[kind] += 1
+        return img
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            "target_size": self.target_size,
+            "reduce": self.reduce,
+            **counters,
+            "decode_ms": self.decode_ms.snapshot()
+        }
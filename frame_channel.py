@@ -0,0 +1,97 @@
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class FrameChannel:
+    """Frames streamed over one persistent Socket.IO connection.
+
+    Clients send numbered frames and get one answer per frame, tagged with
+    the same sequence number, from `emit(sid, payload)`. Each connection
+    may have `window` frames in flight; the window is part of every answer
+    and shrinks to 1 while the server as a whole holds `max_queue` / 2 or
+    more frames, so clients slow down before anything has to be refused.
+    Frames beyond the window are answered at once as "busy", and frames
+    beyond `max_queue` (0 disables the cap) as "overloaded", without
+    being processed. `process(sid, data, options)` runs on a pool of
+    `workers` threads and returns the answer's payload.
+    """
+
+    def __init__(self, process, emit, max_in_flight=2, max_queue=64, workers=4):
+        self.process = process
+        self.emit = emit
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="frame-channel")
+        self._in_flight = {}  # sid -> frames being processed
+        self._queued = 0
+        self._lock = threading.Lock()
+        self._counters = {"received": 0, "answered": 0, "busy": 0, "overloaded": 0, "errors": 0}
+
+    def window(self):
+        with self._lock:
+            return self._window()
+
+    def _window(self):
+        if self.max_queue and self._queued * 2 >= self.max_queue:
+            return 1
+        return self.max_in_flight
+
+    def submit(self, sid, seq, data, options=None):
+        with self._lock:
+            self._counters["received"] += 1
+            in_flight = self._in_flight.get(sid, 0)
+            if self.max_queue and self._queued >= self.max_queue:
+                status = "overloaded"
+            elif in_flight >= self._window():
+                status = "busy"
+            else:
+                status = None
+                self._in_flight[sid] = in_flight + 1
+                self._queued += 1
+            if status is not None:
+                self._counters[status] += 1
+                window = self._window()
+        if status is not None:
+            self.emit(sid, {"seq": seq, "status": status, "window": window})
+            return False
+        self._executor.submit(self._run, sid, seq, data, options or {})
+        return True
+
+    def _run(self, sid, seq, data, options):
+        try:
+            payload = dict(self.process(sid, data, options))
+        except Exception as e:
+            logger.error(f"Error processing socket frame {seq} from {sid}: {e}")
+            payload = {"status": "error", "error": "Internal server error"}
+        with self._lock:
+            self._queued -= 1
+            if sid in self._in_flight:
+                self._in_flight[sid] -= 1
+            self._counters["answered"] += 1
+            if payload.get("status", "ok") == "error":
+                self._counters["errors"] += 1
+            window = self._window()
+        payload.setdefault("status", "ok")
+        self.emit(sid, dict(payload, seq=seq, window=window))
+
+    def open(self, sid):
+        with self._lock:
+            self._in_flight.setdefault(sid, 0)
+
+    def close(self, sid):
+        # Frames still running finish, but their answers go nowhere
+        with self._lock:
+            self._in_flight.pop(sid, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "connections": len(self._in_flight),
+                "max_in_flight": self.max_in_flight,
+                "window": self._window(),
+                "queued": self._queued,
+                **self._counters
+            }
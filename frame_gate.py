@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from thumbnails import thumbnail
+
+THUMBNAIL_SIZE = (32, 32)
+
+
+class FrameGate:
+    """Per-client near-duplicate detection.
+
+    Each client keeps the signature (a small grayscale thumbnail) of the
+    last frame that actually went through the model, plus its detections.
+    A new frame whose mean absolute thumbnail difference is within
+    `threshold` (0-255 scale) reuses those detections instead of running
+    inference, until the cached entry is older than `max_age_s`. The
+    detections are in pixels of the stored frame, so they are only reused
+    for a frame with the same `layout` (resolution and tiling).
+    """
+
+    def __init__(self, threshold=3.0, max_age_s=10.0, max_clients=256):
+        self.threshold = threshold
+        self.max_age_s = max_age_s
+        self.max_clients = max_clients
+        self._entries = OrderedDict()  # client -> (signature, layout, detections, stored_at)
+        self._lock = threading.Lock()
+        self._checks = 0
+        self._skips = 0
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    @staticmethod
+    def signature(img):
+        small = thumbnail(img, THUMBNAIL_SIZE)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+    def lookup(self, client, signature, layout=None):
+        with self._lock:
+            self._checks += 1
+            entry = self._entries.get(client)
+            if entry is None:
+                return None
+            previous, stored_layout, detections, stored_at = entry
+            if stored_layout != layout:
+                return None
+            if time.monotonic() - stored_at > self.max_age_s:
+                return None
+            if np.abs(signature - previous).mean() > self.threshold:
+                return None
+            self._entries.move_to_end(client)
+            self._skips += 1
+            return detections
+
+    def store(self, client, signature, detections, layout=None):
+        with self._lock:
+            self._entries[client] = (signature, layout, detections, time.monotonic())
+            self._entries.move_to_end(client)
+            while len(self._entries) > self.max_clients:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "clients": len(self._entries),
+                "checks": self._checks,
+                "skips": self._skips,
+                "skip_rate": self._skips / self._checks if self._checks else 0.0
+            }
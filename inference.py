@@ -0,0 +1,23 @@
+import numpy as np
+
+# Every backend reduces its output to an (N, 6) float32 array of
+# [x1, y1, x2, y2, conf, cls] in original-image pixels, which is cheap to ship
+# between processes and can be rebuilt into an ultralytics Results object so
+# /detect keeps using boxes.xywhn/cls/conf and plot() unchanged.
+EMPTY_DETECTIONS = np.zeros((0, 6), dtype=np.float32)
+
+
+def results_to_array(result):
+    if result.boxes is None or len(result.boxes) == 0:
+        return EMPTY_DETECTIONS
+    return result.boxes.data[:, :6].cpu().numpy().astype(np.float32, copy=False)
+
+
+def results_from_array(img, data, names):
+    # Imported on first use: torch and ultralytics take seconds to import and
+    # the server binds its port before the model is loaded
+    import torch
+    from ultralytics.engine.results import Results
+
+    data = np.ascontiguousarray(data, dtype=np.float32).reshape(-1, 6)
+    return Results(img, path="", names=names, boxes=torch.from_numpy(data))
@@ -0,0 +1,138 @@
+import threading
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+class JobError(Exception):
+    """Raised by job functions for failures the client should see, with the
+    HTTP status the synchronous endpoint would have used."""
+
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class Job:
+    def __init__(self, kind, sid=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.sid = sid
+        self.status = "queued"  # queued -> running -> done / failed
+        self.result = None
+        self.progress = None
+        self.error = None
+        self.error_status = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "progress": self.progress,
+            "error": self.error,
+            "error_status": self.error_status,
+            "created_at": self.created_at,
+            "queued_ms": round((self.started_at - self.created_at) * 1000.0, 1) if self.started_at else None,
+            "run_ms": round((self.finished_at - self.started_at) * 1000.0, 1) if self.finished_at else None
+        }
+
+
+class JobManager:
+    """Background execution of detection jobs.
+
+    submit() returns immediately with a Job; the work, `fn(job, *args)`,
+    runs on a thread pool of `workers` and `on_done(job)` is called when it
+    finishes (the server pushes the result over Socket.IO). At most
+    `max_pending` jobs may be queued or running; finished jobs can be
+    polled for `ttl_s` seconds.
+    """
+
+    def __init__(self, workers=4, max_pending=256, ttl_s=300.0, on_done=None, name="detect-job"):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl_s = ttl_s
+        self.on_done = on_done
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._jobs = OrderedDict()  # job id -> Job, oldest first
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._counters = {"submitted": 0, "done": 0, "failed": 0, "rejected": 0, "expired": 0}
+
+    def submit(self, kind, fn, *args, sid=None):
+        with self._lock:
+            self._expire()
+            if self._pending >= self.max_pending:
+                self._counters["rejected"] += 1
+                raise QueueFull("Too many jobs pending")
+            job = Job(kind, sid)
+            self._jobs[job.id] = job
+            self._pending += 1
+            self._counters["submitted"] += 1
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def _run(self, job, fn, args):
+        job.started_at = time.time()
+        job.status = "running"
+        try:
+            job.result = fn(job, *args)
+            job.status = "done"
+        except JobError as e:
+            job.error, job.error_status = e.message, e.status
+            job.status = "failed"
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}", exc_info=True)
+            job.error, job.error_status = "Internal server error", 500
+            job.status = "failed"
+        job.finished_at = time.time()
+        with self._lock:
+            self._pending -= 1
+            self._counters[job.status] += 1
+        if self.on_done is not None:
+            try:
+                self.on_done(job)
+            except Exception as e:
+                logger.error(f"Error delivering job {job.id}: {e}")
+
+    def get(self, job_id):
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def _expire(self):
+        # Oldest first; stops at the first job still in use
+        cutoff = time.time() - self.ttl_s
+        while self._jobs:
+            job = next(iter(self._jobs.values()))
+            if not job.finished or job.finished_at > cutoff:
+                break
+            del self._jobs[job.id]
+            self._counters["expired"] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "tracked": len(self._jobs),
+                **self._counters
+            }
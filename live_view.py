@@ -0,0 +1,160 @@
+import base64
+import logging
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from metrics import Histogram
+from overlay import OverlayRenderer
+
+logger = logging.getLogger(__name__)
+
+RENDER_MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250)
+
+
+class LiveView:
+    """Annotated frames for Socket.IO viewers, rendered only when watched.
+
+    Requests publish() the decoded image and its detections under their
+    session, which costs nothing more than keeping a reference; when no
+    subscriber watches that session even that is skipped. Each session
+    has its own slot, so two drones never overwrite each other's frames.
+    A background thread renders (plot, JPEG encode) only the newest
+    published frame of each session, at most `max_fps` times a second per
+    session. Frames replaced before they were rendered are never drawn.
+
+    Subscribers watch one session, or every session with `session` None.
+    Each picks a transport: "binary" gets the JPEG bytes as a binary
+    attachment plus the normalized boxes, classes and confidences;
+    "base64" gets the original `{"image": <base64 string>}` payload. Both
+    carry the frame's `session`. `emit(payload, binary, scope)` is called
+    once per transport and scope (the session, or None) in use.
+    """
+
+    def __init__(self, emit, max_fps=30.0, quality=80):
+        self.emit = emit
+        self.max_fps = max_fps
+        self.quality = quality
+        self.renderer = OverlayRenderer()
+        self.render_ms = Histogram(RENDER_MS_BUCKETS)
+        self._subscribers = {}  # sid -> (transport, session or None)
+        self._latest = {}  # session -> (img, data)
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._counters = {"published": 0, "skipped": 0, "replaced": 0, "rendered": 0,
+                          "binary_bytes": 0, "base64_bytes": 0}
+
+    @property
+    def watching(self):
+        return bool(self._subscribers)
+
+    def _watched(self, session):
+        return any(scope is None or scope == session for _, scope in self._subscribers.values())
+
+    def subscribe(self, sid, binary=False, session=None):
+        """Returns the sid's previous (transport, session), or None."""
+        with self._lock:
+            previous = self._subscribers.get(sid)
+            self._subscribers[sid] = ("binary" if binary else "base64", session)
+            self._drop_unwatched()
+            return previous
+
+    def unsubscribe(self, sid):
+        """Returns the sid's (transport, session), or None."""
+        with self._lock:
+            previous = self._subscribers.pop(sid, None)
+            self._drop_unwatched()
+            return previous
+
+    def _drop_unwatched(self):
+        for session in [session for session in self._latest if not self._watched(session)]:
+            del self._latest[session]
+
+    def publish(self, img, data, session=None):
+        with self._lock:
+            if not self._watched(session):
+                self._counters["skipped"] += 1
+                return
+            if session in self._latest:
+                self._counters["replaced"] += 1
+            self._latest[session] = (img, data)
+            self._counters["published"] += 1
+        self._ready.set()
+
+    def render(self, img, data):
+        annotated = self.renderer.render(img, data)
+        _, buffer = cv2.imencode('.jpg', annotated, [int(cv2.IMWRITE_JPEG_QUALITY), self.quality])
+        return buffer.tobytes()
+
+    @staticmethod
+    def metadata(img, data):
+        # Same normalized xywh boxes as the /detect response
+        h, w = img.shape[:2]
+        x1, y1, x2, y2 = data[:, 0], data[:, 1], data[:, 2], data[:, 3]
+        xywhn = np.stack([(x1 + x2) / (2 * w), (y1 + y2) / (2 * h), (x2 - x1) / w, (y2 - y1) / h], axis=1)
+        return {
+            "width": w,
+            "height": h,
+            "boxes": xywhn.tolist(),
+            "classes": data[:, 5].tolist(),
+            "confidences": data[:, 4].tolist()
+        }
+
+    def send(self, jpeg, img, data, session=None):
+        with self._lock:
+            targets = {(transport, scope) for transport, scope in self._subscribers.values()
+                       if scope is None or scope == session}
+        binary_payload = base64_payload = None
+        for transport, scope in targets:
+            if transport == "binary":
+                if binary_payload is None:
+                    binary_payload = dict(self.metadata(img, data), image=jpeg, format="jpeg", session=session)
+                self.emit(binary_payload, True, scope)
+                with self._lock:
+                    self._counters["binary_bytes"] += len(jpeg)
+            else:
+                if base64_payload is None:
+                    base64_payload = {"image": base64.b64encode(jpeg).decode('utf-8'), "session": session}
+                self.emit(base64_payload, False, scope)
+                with self._lock:
+                    self._counters["base64_bytes"] += len(base64_payload["image"])
+
+    def run(self):
+        interval = 1.0 / self.max_fps
+        while True:
+            self._ready.wait()
+            with self._lock:
+                latest, self._latest = self._latest, {}
+                self._ready.clear()
+            if not latest:
+                continue
+            start = time.monotonic()
+            for session, (img, data) in latest.items():
+                try:
+                    frame_start = time.monotonic()
+                    jpeg = self.render(img, data)
+                    self.render_ms.observe((time.monotonic() - frame_start) * 1000.0)
+                    self.send(jpeg, img, data, session)
+                    with self._lock:
+                        self._counters["rendered"] += 1
+                except Exception as e:
+                    logger.error(f"Error in frame streaming: {e}")
+            time.sleep(max(0.0, interval - (time.monotonic() - start)))
+
+    def start(self):
+        threading.Thread(target=self.run, name="live-view", daemon=True).start()
+        return self
+
+    def stats(self):
+        with self._lock:
+            transports = [transport for transport, _ in self._subscribers.values()]
+            return {
+                "subscribers": len(transports),
+                "binary_subscribers": transports.count("binary"),
+                "watched_sessions": len({scope for _, scope in self._subscribers.values() if scope is not None}),
+                "max_fps": self.max_fps,
+                **self._counters,
+                "render_ms": self.render_ms.snapshot()
+            }
@@ -0,0 +1,34 @@
+import threading
+import bisect
+
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram for tuning knobs exposed on /stats."""
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._count += 1
+            self._sum += value
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            count = self._count
+            total = self._sum
+
+        labels = [f"<={b:g}" for b in self.buckets] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, counts)),
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0
+        }
@@ -0,0 +1,292 @@
+import os
+import threading
+import time
+import logging
+
+import numpy as np
+
+from backends import weights_hash
+
+logger = logging.getLogger(__name__)
+
+# A retired version is released once nothing was submitted to it for this long
+DRAIN_IDLE_S = 1.0
+
+
+class UnknownModel(KeyError):
+    pass
+
+
+class ModelUnavailable(RuntimeError):
+    pass
+
+
+def version_id(weights):
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    return f"{stem}-{weights_hash(weights)[:8]}"
+
+
+class ModelVersion:
+    def __init__(self, version, weights):
+        self.version = version
+        self.weights = weights
+        self.status = "registered"  # registered -> loading -> warming -> ready (-> draining -> unloaded), or failed
+        self.error = None
+        self.engine = None
+        self.scheduler = None
+        self.probe_engine = None
+        self.probe = None  # scheduler of the small cascade model, if any
+        self.names = None
+        self.load_seconds = None
+        self.warmup_ms = []
+        self.loaded_at = None
+        self.last_used = time.monotonic()
+        self.frames = 0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.status == "ready"
+
+    @property
+    def resident(self):
+        return self.status in ("loading", "warming", "ready", "draining")
+
+    def submit(self, img):
+        scheduler = self.scheduler
+        if scheduler is None:
+            raise ModelUnavailable(f"Model {self.version} is {self.status}")
+        with self._lock:
+            self.last_used = time.monotonic()
+            self.frames += 1
+            self.in_flight += 1
+        try:
+            future = scheduler.submit(img)
+        except Exception:
+            self._done()
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, _future=None):
+        with self._lock:
+            self.in_flight -= 1
+
+    def idle(self, idle_s):
+        """Nothing in flight and nothing submitted for `idle_s` seconds."""
+        with self._lock:
+            return self.in_flight == 0 and time.monotonic() - self.last_used >= idle_s
+
+    def stats(self):
+        engine_stats = getattr(self.engine, "stats", None)
+        return {
+            "version": self.version,
+            "weights": self.weights,
+            "status": self.status,
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+            "warmup_ms": self.warmup_ms,
+            "loaded_at": self.loaded_at,
+            "idle_s": round(time.monotonic() - self.last_used, 1),
+            "frames": self.frames,
+            "in_flight": self.in_flight,
+            "batching": self.scheduler.stats() if self.scheduler is not None else None,
+            "worker_pool": engine_stats() if engine_stats is not None else None
+        }
+
+
+class ModelRegistry:
+    """Model versions with background loading, atomic activation and LRU
+    residency.
+
+    `load_engine(weights)` builds an inference engine (backend or worker
+    pool) and `make_scheduler(engine)` the batching scheduler in front of
+    it. With `load_probe(weights)` each version also gets a small cascade
+    model (see cascade.PlantGate) behind its own scheduler. New versions
+    are loaded and warmed in a background thread; only a
+    ready version can become active, so traffic switches without a gap.
+    At most `max_resident` versions stay loaded: the least recently used
+    inactive version is unloaded first, but never the one that just
+    finished loading. Evicted and unloaded versions drain first: they
+    refuse new requests, and their scheduler is released only once the
+    frames already submitted (e.g. by a request that resolved the
+    previous active version, or a running video job) are answered. They
+    stay registered and are reloaded on demand when a request pins them.
+    """
+
+    def __init__(self, load_engine, make_scheduler, max_resident=2, warmup_runs=3, imgsz=640, timeout=30.0,
+                 load_probe=None):
+        self.load_engine = load_engine
+        self.make_scheduler = make_scheduler
+        self.load_probe = load_probe
+        self.max_resident = max(1, max_resident)
+        self.warmup_runs = warmup_runs
+        self.imgsz = imgsz
+        self.timeout = timeout
+        self._versions = {}
+        self._active = None
+        self._lock = threading.RLock()
+
+    @property
+    def active(self):
+        return self._active
+
+    def register(self, weights, version=None):
+        if not os.path.isfile(weights):
+            raise FileNotFoundError(f"Weights file {weights} not found")
+        version = version or version_id(weights)
+        with self._lock:
+            if version not in self._versions:
+                self._versions[version] = ModelVersion(version, weights)
+        return version
+
+    def load(self, version, activate=False, background=True):
+        with self._lock:
+            entry = self._versions.get(version)
+            if entry is None:
+                raise UnknownModel(f"Unknown model version {version}")
+            if entry.status == "draining":
+                # Still loaded: take it back instead of reloading
+                entry.status = "ready"
+                self._evict(keep=entry)
+            if entry.resident:
+                if activate and entry.ready:
+                    self.activate(version)
+                return entry
+            entry.status = "loading"
+            entry.error = None
+        if background:
+            threading.Thread(target=self._load, args=(entry, activate), name=f"model-loader-{version}",
+                             daemon=True).start()
+        else:
+            self._load(entry, activate)
+        return entry
+
+    def _load(self, entry, activate):
+        try:
+            start = time.monotonic()
+            engine = self.load_engine(entry.weights)
+            entry.load_seconds = round(time.monotonic() - start, 3)
+            entry.names = engine.names
+            entry.engine = engine
+
+            if self.load_probe is not None:
+                entry.probe_engine = self.load_probe(entry.weights)
+                entry.probe = self.make_scheduler(entry.probe_engine).start()
+
+            entry.status = "warming"
+            entry.scheduler = self.make_scheduler(engine).start()
+            entry.warmup_ms = []
+            dummy = np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8)
+            if entry.probe is not None:
+                entry.probe.submit(dummy).result(timeout=self.timeout)
+            for _ in range(self.warmup_runs):
+                run_start = time.monotonic()
+                entry.scheduler.submit(dummy).result(timeout=self.timeout)
+                entry.warmup_ms.append(round((time.monotonic() - run_start) * 1000.0, 1))
+
+            entry.loaded_at = time.time()
+            entry.last_used = time.monotonic()
+            entry.status = "ready"
+            logger.info(f"Model {entry.version} ready in {entry.load_seconds}s, warm-up {entry.warmup_ms} ms")
+        except Exception as e:
+            logger.error(f"Error loading model {entry.version}: {e}", exc_info=True)
+            self._release(entry)
+            entry.status = "failed"
+            entry.error = str(e)
+            return
+
+        with self._lock:
+            if activate or self._active is None:
+                self.activate(entry.version)
+            self._evict(keep=entry)
+
+    def activate(self, version):
+        with self._lock:
+            entry = self._versions.get(version)
+            if entry is None:
+                raise UnknownModel(f"Unknown model version {version}")
+            if not entry.ready:
+                raise ModelUnavailable(f"Model {version} is {entry.status}")
+            previous = self._active
+            self._active = entry
+            self._evict(keep=entry)
+        if previous is not entry:
+            logger.info(f"Active model switched from {previous.version if previous else None} to {version}")
+        return entry
+
+    def get(self, version=None):
+        """Ready model for a request: the active one, or a pinned version.
+        Pinning an evicted version starts reloading it in the background."""
+        if version is None:
+            entry = self._active
+            if entry is None:
+                raise ModelUnavailable("Model is loading")
+            return entry
+        with self._lock:
+            entry = self._versions.get(version)
+            if entry is None:
+                raise UnknownModel(f"Unknown model version {version}")
+            if entry.status in ("registered", "unloaded", "failed", "draining"):
+                self.load(version)
+        if not entry.ready:
+            raise ModelUnavailable(f"Model {version} is {entry.status}")
+        return entry
+
+    def unload(self, version):
+        with self._lock:
+            entry = self._versions.get(version)
+            if entry is None:
+                raise UnknownModel(f"Unknown model version {version}")
+            if entry is self._active:
+                raise ModelUnavailable(f"Model {version} is active and cannot be unloaded")
+            if entry.ready:
+                self._retire(entry)
+        return entry
+
+    def _evict(self, keep=None):
+        loaded = [e for e in self._versions.values() if e.ready]
+        candidates = [e for e in loaded if e is not self._active and e is not keep]
+        excess = len(loaded) - self.max_resident
+        for entry in sorted(candidates, key=lambda e: e.last_used)[:max(0, excess)]:
+            logger.info(f"Evicting least recently used model {entry.version}")
+            self._retire(entry)
+
+    def _retire(self, entry):
+        entry.status = "draining"
+        threading.Thread(target=self._drain, args=(entry,), name=f"model-drain-{entry.version}",
+                         daemon=True).start()
+
+    def _drain(self, entry):
+        while not entry.idle(DRAIN_IDLE_S):
+            time.sleep(DRAIN_IDLE_S / 4)
+        with self._lock:
+            # Loaded again while draining
+            if entry.status != "draining":
+                return
+            self._release(entry)
+            entry.status = "unloaded"
+        logger.info(f"Model {entry.version} unloaded")
+
+    def _release(self, entry):
+        released = [(entry.scheduler, entry.engine), (entry.probe, entry.probe_engine)]
+        entry.scheduler = entry.engine = entry.probe = entry.probe_engine = None
+        for scheduler, engine in released:
+            if scheduler is not None:
+                scheduler.stop()
+            close = getattr(engine, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    logger.error(f"Error closing model {entry.version}: {e}")
+
+    def pending(self):
+        with self._lock:
+            return sum(e.scheduler.pending() for e in self._versions.values() if e.scheduler is not None)
+
+    def list(self):
+        with self._lock:
+            active = self._active.version if self._active else None
+            return [dict(entry.stats(), active=entry.version == active) for entry in self._versions.values()]
@@ -0,0 +1,70 @@
+import cv2
+import numpy as np
+
+# Same convention as drawBoxes in src/pages/Home.js: class 0 is drawn red
+# and labelled "Infested", everything else green and "Healthy", 2px boxes,
+# label baseline 5px above the box (20px inside it near the top edge).
+LABELS = ("Infested", "Healthy")
+COLORS = ((0, 0, 255), (0, 128, 0))  # BGR for CSS red / green
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+FONT_SCALE = 0.6
+FONT_THICKNESS = 1
+LABEL_ABOVE = 5
+LABEL_INSIDE = 20
+
+
+def _glyph(text):
+    # Pixel offsets of the rendered label relative to its baseline origin
+    (w, h), baseline = cv2.getTextSize(text, FONT, FONT_SCALE, FONT_THICKNESS)
+    canvas = np.zeros((h + baseline, w), np.uint8)
+    cv2.putText(canvas, text, (0, h), FONT, FONT_SCALE, 255, FONT_THICKNESS, cv2.LINE_AA)
+    ys, xs = np.nonzero(canvas > 127)
+    return (ys - h).astype(np.int32), xs.astype(np.int32)
+
+
+class OverlayRenderer:
+    """Box and label overlay for the two FAW classes.
+
+    Copies the frame into an output buffer that is reused while the frame
+    size stays the same, draws all boxes of a class with one
+    cv2.polylines call (nested 1px outlines, much cheaper than OpenCV's
+    thick-line path) and stamps the label glyphs (rendered once at
+    start-up) of all boxes of a class with one indexed assignment.
+    The returned image is that buffer: it is overwritten by the next
+    render() call, so encode or copy it first.
+    """
+
+    def __init__(self, thickness=2):
+        self.thickness = thickness
+        self.glyphs = [_glyph(label) for label in LABELS]
+        # Corner offsets of the nested outlines, innermost last
+        self.insets = np.array([[[k, k], [-k, k], [-k, -k], [k, -k]] for k in range(thickness)], np.int32)
+        self._buffer = None
+
+    def render(self, img, data):
+        if self._buffer is None or self._buffer.shape != img.shape:
+            self._buffer = np.empty_like(img)
+        out = self._buffer
+        np.copyto(out, img)
+        if not len(data):
+            return out
+
+        h, w = out.shape[:2]
+        xyxy = np.rint(data[:, :4]).astype(np.int32)
+        healthy = data[:, 5] != 0
+        for cls, boxes in enumerate((xyxy[~healthy], xyxy[healthy])):
+            if not len(boxes):
+                continue
+            x1, y1, x2, y2 = boxes.T
+            corners = np.stack([np.stack([x1, y1], 1), np.stack([x2, y1], 1),
+                                np.stack([x2, y2], 1), np.stack([x1, y2], 1)], axis=1)
+            outlines = (corners[None] + self.insets[:, None]).reshape(-1, 4, 2)
+            cv2.polylines(out, list(outlines), True, COLORS[cls], 1, cv2.LINE_4)
+
+            gy, gx = self.glyphs[cls]
+            baseline = np.where(y1 > LABEL_INSIDE, y1 - LABEL_ABOVE, y1 + LABEL_INSIDE)
+            ys = (baseline[:, None] + gy[None, :]).ravel()
+            xs = (x1[:, None] + gx[None, :]).ravel()
+            inside = (ys >= 0) & (ys < h) & (xs >= 0) & (xs < w)
+            out[ys[inside], xs[inside]] = COLORS[cls]
+        return out
@@ -0,0 +1,251 @@
+"""Build an INT8 ONNX variant of the FAW detector calibrated on field frames.
+
+    python quantize.py --frames frame_archive/ --samples 200
+
+The FP32 ONNX export is statically quantized (QDQ, per-channel weights) with
+activation ranges calibrated on a random sample of the given frames. The
+detection head stays in FP32 since it is the most sensitive to rounding.
+The INT8 model is written to the model cache next to the FP32 export, where
+FAW_BACKEND=onnx-int8 picks it up for the same weights.
+
+A report comparing the INT8 model to FP32 on held-out frames is printed and
+saved as JSON: mAP50/precision/recall of INT8 detections scored against the
+FP32 detections as pseudo ground truth, plus latency for both.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import time
+
+import cv2
+import numpy as np
+import onnx
+from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType,
+                                      quantize_static)
+from onnxruntime.quantization.shape_inference import quant_pre_process
+
+from backends import INT8_SUFFIX, OnnxBackend, artifact_path, preprocess
+from benchmarking import percentile
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+MATCH_IOU = 0.5
+
+
+class FrameCalibrationReader(CalibrationDataReader):
+    def __init__(self, files, input_name, imgsz):
+        self._files = iter(files)
+        self._input_name = input_name
+        self._imgsz = imgsz
+
+    def get_next(self):
+        for path in self._files:
+            img = cv2.imread(path)
+            if img is not None:
+                batch, _ = preprocess([img], self._imgsz)
+                return {self._input_name: batch}
+        return None
+
+
+def find_frames(root):
+    frames = []
+    for dirpath, _, filenames in os.walk(root):
+        frames.extend(os.path.join(dirpath, f) for f in filenames if f.lower().endswith(IMAGE_EXTENSIONS))
+    return sorted(frames)
+
+
+def head_nodes(model):
+    # Nodes of the last "/model.N/" module, i.e. the Detect head
+    indices = {}
+    for node in model.graph.node:
+        match = re.match(r"/model\.(\d+)/", node.name)
+        if match:
+            indices.setdefault(int(match.group(1)), []).append(node.name)
+    return indices[max(indices)] if indices else []
+
+
+def quantize(fp32_path, int8_path, calibration_files, imgsz, method):
+    prepared_path = int8_path + ".prep.onnx"
+    try:
+        quant_pre_process(fp32_path, prepared_path, skip_symbolic_shape=True)
+    except Exception as e:
+        print(f"Pre-processing failed ({e}), quantizing the raw export")
+        shutil.copyfile(fp32_path, prepared_path)
+
+    model = onnx.load(prepared_path)
+    input_name = model.graph.input[0].name
+    excluded = head_nodes(model)
+    print(f"Calibrating on {len(calibration_files)} frames, keeping {len(excluded)} head nodes in FP32")
+
+    quantize_static(
+        prepared_path,
+        int8_path,
+        FrameCalibrationReader(calibration_files, input_name, imgsz),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=method,
+        nodes_to_exclude=excluded)
+    os.remove(prepared_path)
+
+    # Keep the ultralytics metadata (class names, imgsz) the backend reads
+    fp32 = onnx.load(fp32_path)
+    int8 = onnx.load(int8_path)
+    del int8.metadata_props[:]
+    int8.metadata_props.extend(fp32.metadata_props)
+    onnx.save(int8, int8_path)
+
+
+def box_iou(a, b):
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:4] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:4] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def match(reference, candidate):
+    """Greedy same-class matching at MATCH_IOU, highest confidence first.
+    Returns a true-positive flag per candidate detection."""
+    flags = np.zeros(len(candidate), dtype=bool)
+    if len(reference) == 0 or len(candidate) == 0:
+        return flags
+    ious = box_iou(candidate, reference)
+    ious[candidate[:, 5][:, None] != reference[:, 5][None, :]] = 0
+    taken = np.zeros(len(reference), dtype=bool)
+    for i in np.argsort(-candidate[:, 4]):
+        j = int(np.argmax(np.where(taken, 0, ious[i])))
+        if ious[i, j] >= MATCH_IOU and not taken[j]:
+            taken[j] = True
+            flags[i] = True
+    return flags
+
+
+def average_precision(confidences, flags, total):
+    if total == 0:
+        return None
+    if len(confidences) == 0:
+        return 0.0
+    order = np.argsort(-np.asarray(confidences))
+    tp = np.cumsum(np.asarray(flags)[order])
+    recall = tp / total
+    precision = tp / np.arange(1, len(order) + 1)
+    # All-point interpolation
+    recall = np.concatenate([[0.0], recall, [1.0]])
+    precision = np.concatenate([[1.0], precision, [0.0]])
+    precision = np.maximum.accumulate(precision[::-1])[::-1]
+    return float(np.sum((recall[1:] - recall[:-1]) * precision[1:]))
+
+
+def proxy_metrics(reference, candidate, names):
+    per_class = {c: {"conf": [], "tp": [], "total": 0} for c in names}
+    tp = fp = fn = 0
+    for ref, cand in zip(reference, candidate):
+        flags = match(ref, cand)
+        tp += int(flags.sum())
+        fp += int((~flags).sum())
+        fn += len(ref) - int(flags.sum())
+        for c in per_class:
+            per_class[c]["total"] += int((ref[:, 5] == c).sum())
+            mask = cand[:, 5] == c
+            per_class[c]["conf"].extend(cand[mask, 4].tolist())
+            per_class[c]["tp"].extend(flags[mask].tolist())
+
+    ap = {names[c]: average_precision(v["conf"], v["tp"], v["total"]) for c, v in per_class.items()}
+    scored = [v for v in ap.values() if v is not None]
+    return {
+        "map50": float(np.mean(scored)) if scored else None,
+        "ap50": ap,
+        "precision": tp / (tp + fp) if tp + fp else None,
+        "recall": tp / (tp + fn) if tp + fn else None,
+        "fp32_detections": tp + fn,
+        "int8_detections": tp + fp
+    }
+
+
+def run(backend, images):
+    outputs = []
+    latencies = []
+    for img in images:
+        start = time.perf_counter()
+        outputs.append(backend.predict([img])[0])
+        latencies.append((time.perf_counter() - start) * 1000.0)
+    return outputs, latencies
+
+
+def latency_summary(latencies):
+    return {
+        "mean_ms": float(np.mean(latencies)),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", default="best.pt")
+    parser.add_argument("--frames", required=True, help="Directory of stored field frames (searched recursively)")
+    parser.add_argument("--samples", type=int, default=200, help="Number of calibration frames")
+    parser.add_argument("--eval-samples", type=int, default=100, help="Number of held-out frames for the report")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.5)
+    parser.add_argument("--iou", type=float, default=0.5)
+    parser.add_argument("--method", choices=["minmax", "entropy", "percentile"], default="minmax")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--cache-dir", default="model_cache")
+    parser.add_argument("--report", default=None, help="Report path (default: next to the INT8 model)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    frames = find_frames(args.frames)
+    if not frames:
+        parser.error(f"No images found under {args.frames}")
+    random.Random(args.seed).shuffle(frames)
+    calibration_files = frames[:args.samples]
+    # Evaluate on frames the calibration did not see when there are enough
+    eval_files = frames[args.samples:args.samples + args.eval_samples] or calibration_files[:args.eval_samples]
+
+    backend_kwargs = {"imgsz": args.imgsz, "conf": args.conf, "iou": args.iou,
+                      "threads": args.threads, "cache_dir": args.cache_dir}
+    fp32 = OnnxBackend(args.weights, **backend_kwargs)
+    int8_path = artifact_path(args.weights, args.imgsz, args.cache_dir, INT8_SUFFIX)
+    method = {"minmax": CalibrationMethod.MinMax,
+              "entropy": CalibrationMethod.Entropy,
+              "percentile": CalibrationMethod.Percentile}[args.method]
+    quantize(fp32.path, int8_path, calibration_files, args.imgsz, method)
+    print(f"Wrote {int8_path}")
+
+    int8 = OnnxBackend(args.weights, quantized=True, **backend_kwargs)
+    images = [img for img in (cv2.imread(f) for f in eval_files) if img is not None]
+    # Warm both sessions before timing
+    for backend in (fp32, int8):
+        for img in images[:3]:
+            backend.predict([img])
+    fp32_out, fp32_latency = run(fp32, images)
+    int8_out, int8_latency = run(int8, images)
+
+    report = {
+        "weights": args.weights,
+        "int8_model": int8_path,
+        "calibration_frames": len(calibration_files),
+        "eval_frames": len(images),
+        "calibration_method": args.method,
+        "accuracy_vs_fp32": proxy_metrics(fp32_out, int8_out, fp32.names),
+        "latency": {"fp32": latency_summary(fp32_latency), "int8": latency_summary(int8_latency)}
+    }
+    report["latency"]["speedup"] = report["latency"]["fp32"]["mean_ms"] / report["latency"]["int8"]["mean_ms"]
+
+    report_path = args.report or os.path.splitext(int8_path)[0] + "-report.json"
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    print(f"Report saved to {report_path}")
+    print("Serve it with FAW_BACKEND=onnx-int8")
+
+
+if __name__ == "__main__":
+    main()
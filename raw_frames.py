@@ -0,0 +1,59 @@
+import struct
+
+import cv2
+import numpy as np
+
+# Uncompressed frames skip the codec entirely: a 12-byte header followed by
+# the pixel rows, tightly packed.
+#   magic "FAWR" | width uint16 LE | height uint16 LE | format uint8 | 3 reserved
+RAW_MAGIC = b"FAWR"
+RAW_HEADER = struct.Struct("<4sHHB3x")
+RAW_FORMATS = {"bgr": 0, "rgb": 1, "nv12": 2, "bgra": 3, "rgba": 4}
+_FORMAT_NAMES = {code: name for name, code in RAW_FORMATS.items()}
+_CONVERSIONS = {"rgb": cv2.COLOR_RGB2BGR, "bgra": cv2.COLOR_BGRA2BGR, "rgba": cv2.COLOR_RGBA2BGR,
+                "nv12": cv2.COLOR_YUV2BGR_NV12}
+
+
+class RawFrameError(ValueError):
+    pass
+
+
+def is_raw(data):
+    return bytes(data[:len(RAW_MAGIC)]) == RAW_MAGIC
+
+
+def frame_size(width, height, fmt):
+    if fmt == "nv12":
+        return width * height * 3 // 2
+    return width * height * (4 if fmt in ("bgra", "rgba") else 3)
+
+
+def pack_raw(img, fmt="bgr"):
+    """Header + pixels for an (H, W, C) frame, or an (H * 3/2, W) NV12 plane."""
+    height, width = (img.shape[0] * 2 // 3, img.shape[1]) if fmt == "nv12" else img.shape[:2]
+    return RAW_HEADER.pack(RAW_MAGIC, width, height, RAW_FORMATS[fmt]) + np.ascontiguousarray(img).tobytes()
+
+
+def unpack_raw(data):
+    """BGR image for a raw frame. BGR bodies are wrapped without copying (the
+    result is read-only); other formats take one colour conversion."""
+    if len(data) < RAW_HEADER.size:
+        raise RawFrameError("Raw frame header is truncated")
+    _, width, height, code = RAW_HEADER.unpack_from(data)
+    fmt = _FORMAT_NAMES.get(code)
+    if fmt is None:
+        raise RawFrameError(f"Unknown raw pixel format {code}")
+    if width == 0 or height == 0 or (fmt == "nv12" and (width % 2 or height % 2)):
+        raise RawFrameError(f"Invalid raw frame size {width}x{height} for {fmt}")
+    expected = frame_size(width, height, fmt)
+    if len(data) - RAW_HEADER.size != expected:
+        raise RawFrameError(f"Raw {fmt} frame of {width}x{height} needs {expected} bytes, "
+                            f"got {len(data) - RAW_HEADER.size}")
+
+    pixels = np.frombuffer(data, np.uint8, count=expected, offset=RAW_HEADER.size)
+    if fmt == "nv12":
+        return cv2.cvtColor(pixels.reshape(height * 3 // 2, width), _CONVERSIONS[fmt])
+    img = pixels.reshape(height, width, -1)
+    if fmt == "bgr":
+        return img
+    return cv2.cvtColor(img, _CONVERSIONS[fmt])
@@ -0,0 +1,164 @@
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """Content-addressed LRU cache for finished responses.
+
+    Keys hash the raw request bytes together with everything that changes
+    the answer (endpoint, model version, inference, tiling, cascade and
+    decode settings), so a hit can skip decode and inference entirely.
+    Entries expire after `ttl_s`; the memory tier is capped at `max_bytes`
+    of pickled values. With `disk_dir` set, entries are also written to
+    disk (capped at `disk_max_bytes`) and survive restarts.
+    """
+
+    def __init__(self, max_bytes, ttl_s=300.0, disk_dir=None, disk_max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expirations": 0,
+                          "disk_evictions": 0}
+        self._disk_bytes = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(payload, *params):
+        digest = hashlib.blake2b(payload, digest_size=16)
+        digest.update(repr(params).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return value
+                del self._entries[key]
+                self._bytes -= size
+                self._counters["expirations"] += 1
+
+        value = self._disk_get(key)
+        with self._lock:
+            if value is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+        self._insert(key, value, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        return value
+
+    def put(self, key, value):
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self._insert(key, value, blob)
+        self._disk_put(key, blob)
+
+    def _insert(self, key, value, blob):
+        size = len(blob)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size, time.monotonic() + self.ttl_s)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._counters["evictions"] += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_s:
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Result cache read error for {path}: {e}")
+            return None
+
+    def _disk_put(self, key, blob):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+            with self._disk_lock:
+                self._disk_bytes += len(blob)
+                over_budget = self._disk_bytes > self.disk_max_bytes
+            if over_budget:
+                self._disk_prune()
+        except Exception as e:
+            logger.error(f"Result cache write error for {path}: {e}")
+
+    def _disk_files(self):
+        files = []
+        with os.scandir(self.disk_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".pkl"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _disk_prune(self):
+        # Oldest files go first until the directory is back under budget
+        with self._disk_lock:
+            files = sorted(self._disk_files())
+            total = sum(size for _, size, _ in files)
+            for _, size, path in files:
+                if total <= self.disk_max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    self._counters["disk_evictions"] += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self._disk_bytes = total
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_s": self.ttl_s,
+                "disk_dir": self.disk_dir,
+                "hit_rate": (self._counters["hits"] + self._counters["disk_hits"]) / lookups if lookups else 0.0,
+                **self._counters
+            }
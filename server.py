@@ -1,6 +1,5 @@
-from flask import Flask, request, jsonify
-from flask_socketio import SocketIO
-from ultralytics import YOLO
+from flask import Flask, request, jsonify, send_from_directory
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import cv2
 import numpy as np
 import time
@@ -9,8 +8,34 @@ from datetime import datetime
 import sqlite3
 import base64
 from flask_cors import CORS
-from queue import Queue
 import logging
+import math
+import os
+import uuid
+from urllib.parse import urlsplit
+from werkzeug.utils import secure_filename
+
+import autotune
+from admission import AdmissionControl, Overloaded, Superseded
+from backends import load_backend
+from batching import BatchScheduler
+from benchmarking import load_images
+from cascade import PlantGate
+from coalescing import SingleFlight
+from decoding import ImageDecoder
+from frame_channel import FrameChannel
+from frame_gate import FrameGate
+from inference import EMPTY_DETECTIONS, results_from_array
+from jobs import JobError, JobManager, QueueFull
+from live_view import LiveView
+from model_registry import ModelRegistry, ModelUnavailable, UnknownModel
+from raw_frames import RawFrameError
+from result_cache import ResultCache
+from sessions import SessionManager
+from stream_ingest import IngestManager
+from tiling import TiledDetector
+from video_pipeline import VideoPipeline
+from worker_pool import InferencePool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,21 +50,260 @@ socketio = SocketIO(app,
                    logger=True,
                    engineio_logger=True)
 
-# Load YOLOv8 model
-try:
-    model = YOLO("best.pt")
-    logger.info("YOLO model loaded successfully")
-except Exception as e:
-    logger.error(f"Error loading YOLO model: {e}")
-    exit(1)
-
-# Thread-safe frame buffer using Queue
-frame_buffer = Queue(maxsize=10)  # Limit buffer size to prevent memory issues
-detection_counts = {
-    "infested": 0,
-    "not_infested": 0
+# Inference settings (override via environment)
+MODEL_WEIGHTS = os.environ.get("FAW_MODEL", "best.pt")
+MODEL_CACHE_DIR = os.environ.get("FAW_MODEL_CACHE", "model_cache")
+INFERENCE_BACKEND = os.environ.get("FAW_BACKEND", "torch")
+INFERENCE_IMGSZ = int(os.environ.get("FAW_IMGSZ", 640))
+INFERENCE_CONF = float(os.environ.get("FAW_CONF", 0.5))
+INFERENCE_IOU = float(os.environ.get("FAW_IOU", 0.5))
+INFERENCE_THREADS = int(os.environ.get("FAW_INFERENCE_THREADS", 0)) or None
+ORT_INTER_THREADS = int(os.environ.get("FAW_ORT_INTER_THREADS", 1))
+OV_REQUESTS = int(os.environ.get("FAW_OV_REQUESTS", 0))
+BATCH_MAX_SIZE = int(os.environ.get("FAW_BATCH_MAX_SIZE", 8))
+BATCH_MAX_WAIT_MS = float(os.environ.get("FAW_BATCH_MAX_WAIT_MS", 10))
+INFERENCE_TIMEOUT_S = float(os.environ.get("FAW_INFERENCE_TIMEOUT_S", 30))
+INFERENCE_WORKERS = int(os.environ.get("FAW_INFERENCE_WORKERS", 0))
+TILE_MODE = os.environ.get("FAW_TILE_MODE", "off")
+TILE_SIZE = int(os.environ.get("FAW_TILE_SIZE", 640))
+TILE_OVERLAP = float(os.environ.get("FAW_TILE_OVERLAP", 0.2))
+TILE_MAX_TILES = int(os.environ.get("FAW_TILE_MAX_TILES", 16))
+TILE_MIN_SIDE = int(os.environ.get("FAW_TILE_MIN_SIDE", 1280))
+TILE_FULL_FRAME = os.environ.get("FAW_TILE_FULL_FRAME", "0") == "1"
+FRAME_GATE_THRESHOLD = float(os.environ.get("FAW_FRAME_GATE_THRESHOLD", 3.0))
+FRAME_GATE_MAX_AGE_S = float(os.environ.get("FAW_FRAME_GATE_MAX_AGE_S", 10))
+RESULT_CACHE_MB = float(os.environ.get("FAW_RESULT_CACHE_MB", 64))
+RESULT_CACHE_TTL_S = float(os.environ.get("FAW_RESULT_CACHE_TTL_S", 300))
+RESULT_CACHE_DIR = os.environ.get("FAW_RESULT_CACHE_DIR") or None
+RESULT_CACHE_DISK_MB = float(os.environ.get("FAW_RESULT_CACHE_DISK_MB", 512))
+WARMUP_RUNS = int(os.environ.get("FAW_WARMUP_RUNS", 3))
+MAX_RESIDENT_MODELS = int(os.environ.get("FAW_MAX_RESIDENT_MODELS", 2))
+AUTOTUNE = os.environ.get("FAW_AUTOTUNE", "0") == "1"
+AUTOTUNE_IMAGES = os.environ.get("FAW_AUTOTUNE_IMAGES") or None
+AUTOTUNE_MAX_P95_MS = float(os.environ.get("FAW_AUTOTUNE_MAX_P95_MS", 500))
+CASCADE_MODE = os.environ.get("FAW_CASCADE_MODE", "off")
+CASCADE_MIN_GREEN = float(os.environ.get("FAW_CASCADE_MIN_GREEN", 0.02))
+CASCADE_EXG_THRESHOLD = float(os.environ.get("FAW_CASCADE_EXG_THRESHOLD", 20))
+CASCADE_IMGSZ = int(os.environ.get("FAW_CASCADE_IMGSZ", 160))
+CASCADE_CONF = float(os.environ.get("FAW_CASCADE_CONF", 0.1))
+REDUCED_DECODE = os.environ.get("FAW_REDUCED_DECODE", "1") == "1"
+STREAMS = os.environ.get("FAW_STREAMS", "")
+STREAM_FPS = float(os.environ.get("FAW_STREAM_FPS", 2))
+VIDEO_FPS = float(os.environ.get("FAW_VIDEO_FPS", 5))
+VIDEO_DIR = os.environ.get("FAW_VIDEO_DIR", "videos")
+VIDEO_WORKERS = int(os.environ.get("FAW_VIDEO_WORKERS", 1))
+VIDEO_DECODE_WORKERS = int(os.environ.get("FAW_VIDEO_DECODE_WORKERS", 1))
+VIDEO_SEGMENT_S = float(os.environ.get("FAW_VIDEO_SEGMENT_S", 60))
+JOB_WORKERS = int(os.environ.get("FAW_JOB_WORKERS", 4))
+JOB_MAX_PENDING = int(os.environ.get("FAW_JOB_MAX_PENDING", 256))
+JOB_TTL_S = float(os.environ.get("FAW_JOB_TTL_S", 300))
+ADMISSION_MAX_QUEUE = int(os.environ.get("FAW_ADMISSION_MAX_QUEUE", 64))
+SOCKET_MAX_IN_FLIGHT = int(os.environ.get("FAW_SOCKET_MAX_IN_FLIGHT", 2))
+SESSION_IDLE_S = float(os.environ.get("FAW_SESSION_IDLE_S", 3600))
+READY_RETRY_AFTER_S = 2
+OVERLOAD_RETRY_AFTER_S = 1
+
+backend_kwargs = {
+    "name": INFERENCE_BACKEND,
+    "weights": MODEL_WEIGHTS,
+    "imgsz": INFERENCE_IMGSZ,
+    "conf": INFERENCE_CONF,
+    "iou": INFERENCE_IOU,
+    "inter_threads": ORT_INTER_THREADS,
+    "ov_requests": OV_REQUESTS,
+    "cache_dir": MODEL_CACHE_DIR
+}
+
+# Model versions live in a registry: each is loaded and warmed in the
+# background (so the port opens immediately and retrained weights can be
+# swapped in without a restart) and gets its own batching scheduler.
+# Spawned inference workers re-import this module, which must stay cheap
+# for them.
+SERVER_STARTED_AT = time.time()
+
+# Thread layout of the inference engine; replaced by the autotuner's
+# choice for this machine when FAW_AUTOTUNE=1
+engine_config = {
+    "workers": INFERENCE_WORKERS,
+    "threads": INFERENCE_THREADS,
+    "inter_threads": ORT_INTER_THREADS,
+    "cv2_threads": 1
 }
-tracked_objects = set()
+
+def load_engine(weights):
+    kwargs = dict(backend_kwargs, weights=weights, inter_threads=engine_config["inter_threads"])
+    if engine_config["workers"] > 0:
+        # Each worker process loads its own copy of the weights
+        return InferencePool(kwargs,
+                             engine_config["workers"],
+                             threads=engine_config["threads"],
+                             inter_threads=engine_config["inter_threads"],
+                             cv2_threads=engine_config["cv2_threads"]).start()
+    return load_backend(threads=engine_config["threads"], **kwargs)
+
+def make_scheduler(engine):
+    # Micro-batching: concurrent requests share one forward pass, with one
+    # batch in flight per inference worker (or per async infer request)
+    return BatchScheduler(engine.predict,
+                          max_batch_size=BATCH_MAX_SIZE,
+                          max_wait_ms=BATCH_MAX_WAIT_MS,
+                          workers=engine.concurrency)
+
+def load_probe(weights):
+    # Cascade first stage: the same weights at a small input size and a
+    # low confidence, loaded in-process next to the full model. quantize.py
+    # only builds INT8 models at the full input size, so an INT8 engine
+    # gets an FP32 ONNX probe
+    name = "onnx" if INFERENCE_BACKEND == "onnx-int8" else INFERENCE_BACKEND
+    kwargs = dict(backend_kwargs, name=name, weights=weights, imgsz=CASCADE_IMGSZ, conf=CASCADE_CONF)
+    return load_backend(threads=INFERENCE_THREADS, **kwargs)
+
+registry = ModelRegistry(load_engine,
+                         make_scheduler,
+                         max_resident=MAX_RESIDENT_MODELS,
+                         warmup_runs=WARMUP_RUNS,
+                         imgsz=INFERENCE_IMGSZ,
+                         timeout=INFERENCE_TIMEOUT_S,
+                         load_probe=load_probe if CASCADE_MODE == "detector" else None)
+
+def load_model():
+    if AUTOTUNE:
+        try:
+            images = load_images(AUTOTUNE_IMAGES, 16, INFERENCE_IMGSZ)
+            engine_config.update(autotune.load_or_tune(backend_kwargs, images, max_p95_ms=AUTOTUNE_MAX_P95_MS))
+        except Exception as e:
+            logger.error(f"Autotuning failed, keeping configured threads: {e}", exc_info=True)
+    # Decoding, thumbnails and the overlay run here, on request threads
+    # that compete with each other: same OpenCV thread count as tuned for
+    cv2.setNumThreads(engine_config["cv2_threads"])
+    try:
+        registry.load(registry.register(MODEL_WEIGHTS), activate=True, background=False)
+    except Exception as e:
+        logger.error(f"Error loading YOLO model: {e}")
+
+def model_ready():
+    return registry.active is not None
+
+def resolve_model():
+    """Model for this request: ?model=<version> (or X-Model-Version) pins a
+    version, otherwise the active one. Returns (model, error response)."""
+    try:
+        return registry.get(request.args.get('model') or request.headers.get('X-Model-Version')), None
+    except UnknownModel as e:
+        return None, ({"error": e.args[0]}, 404)
+    except ModelUnavailable as e:
+        return None, ({"error": str(e)}, 503, {"Retry-After": str(READY_RETRY_AFTER_S)})
+
+# Sliced inference for large drone stills
+tiler = TiledDetector(mode=TILE_MODE,
+                      tile_size=TILE_SIZE,
+                      overlap=TILE_OVERLAP,
+                      max_tiles=TILE_MAX_TILES,
+                      min_side=TILE_MIN_SIDE,
+                      iou=INFERENCE_IOU,
+                      full_frame=TILE_FULL_FRAME)
+
+def tiling_override():
+    # ?tiled=1 / ?tiled=0 forces sliced inference on or off for one request
+    value = request.args.get('tiled')
+    return None if value is None else value.lower() in ("1", "true", "yes")
+
+# Cheap plant-presence check in front of the full detector
+plant_gate = PlantGate(mode=CASCADE_MODE,
+                       min_green=CASCADE_MIN_GREEN,
+                       exg_threshold=CASCADE_EXG_THRESHOLD,
+                       timeout=INFERENCE_TIMEOUT_S)
+
+def detect(img, model, tiled=None):
+    if plant_gate.enabled and not plant_gate.check(img, model.probe):
+        return EMPTY_DETECTIONS
+    start = time.monotonic()
+    if tiler.should_tile(img, tiled):
+        data = tiler.detect(img, model.submit, timeout=INFERENCE_TIMEOUT_S)
+    else:
+        data = model.submit(img).result(timeout=INFERENCE_TIMEOUT_S)
+    if plant_gate.enabled:
+        plant_gate.observe_detector((time.monotonic() - start) * 1000.0)
+    return data
+
+def infer(img, model, tiled=None):
+    return results_from_array(img, detect(img, model, tiled), model.names)
+
+# Large JPEGs are decoded at reduced scale, down to what the model needs
+decoder = ImageDecoder(target_size=INFERENCE_IMGSZ, reduce=REDUCED_DECODE)
+
+def decode_frame(img_bytes, tiled=None):
+    # Sliced inference needs the full-resolution pixels
+    size = decoder.size(img_bytes)
+    full = size is not None and tiler.should_tile_size(size[1], size[0], tiled)
+    return decoder.decode(img_bytes, full=full)
+
+# Skip inference on frames that barely changed since the client's last one
+frame_gate = FrameGate(threshold=FRAME_GATE_THRESHOLD, max_age_s=FRAME_GATE_MAX_AGE_S)
+
+# Finished responses keyed by request bytes + model version + params
+result_cache = ResultCache(max_bytes=int(RESULT_CACHE_MB * 1024 * 1024),
+                           ttl_s=RESULT_CACHE_TTL_S,
+                           disk_dir=RESULT_CACHE_DIR,
+                           disk_max_bytes=int(RESULT_CACHE_DISK_MB * 1024 * 1024))
+
+# Every setting that changes a response is part of its key; the disk tier
+# outlives the process, so a restart with new settings must not hit old entries
+ANSWER_SETTINGS = (INFERENCE_BACKEND, INFERENCE_IMGSZ, INFERENCE_CONF, INFERENCE_IOU,
+                   TILE_MODE, TILE_SIZE, TILE_OVERLAP, TILE_MAX_TILES, TILE_MIN_SIDE, TILE_FULL_FRAME,
+                   CASCADE_MODE, CASCADE_MIN_GREEN, CASCADE_EXG_THRESHOLD, CASCADE_IMGSZ, CASCADE_CONF,
+                   REDUCED_DECODE)
+
+def cache_key(endpoint, img_bytes, model, tiled):
+    return result_cache.make_key(img_bytes, endpoint, model.version, tiled, *ANSWER_SETTINGS)
+
+# Concurrent requests with identical bytes share one computation
+inflight = SingleFlight()
+
+# One /detect frame in flight per client; newer frames replace queued ones
+admission = AdmissionControl(max_queue=ADMISSION_MAX_QUEUE)
+
+def client_id():
+    # Browsers can tag their stream; otherwise fall back to the peer address.
+    # This is also the session its counts and summaries belong to
+    return request.headers.get('X-Client-Id') or request.args.get('client') or request.remote_addr
+
+# Annotated frames go to sockets subscribed to 'video_frame', and are
+# only rendered while there are some. Subscribers choose base64 strings
+# (the original payload) or binary JPEG attachments with box metadata, and
+# one session's frames ({"session": <client id>}) or everyone's.
+VIDEO_FRAME_ROOM = 'video_frame'
+VIDEO_FRAME_BINARY_ROOM = 'video_frame_binary'
+
+def video_frame_room(binary, session=None):
+    room = VIDEO_FRAME_BINARY_ROOM if binary else VIDEO_FRAME_ROOM
+    return room if session is None else f"{room}:{session}"
+
+def emit_video_frame(payload, binary, session):
+    socketio.emit('video_frame', payload, to=video_frame_room(binary, session))
+
+live_view = LiveView(emit_video_frame)
+
+@socketio.on('subscribe_frames')
+def subscribe_frames(options=None):
+    options = options or {}
+    binary = bool(options.get('binary'))
+    session = options.get('session') or None
+    previous = live_view.subscribe(request.sid, binary=binary, session=session)
+    if previous is not None:
+        leave_room(video_frame_room(previous[0] == "binary", previous[1]))
+    join_room(video_frame_room(binary, session))
+
+@socketio.on('unsubscribe_frames')
+def unsubscribe_frames(*_):
+    previous = live_view.unsubscribe(request.sid)
+    if previous is not None:
+        leave_room(video_frame_room(previous[0] == "binary", previous[1]))
+
+@socketio.on('disconnect')
+def on_disconnect(*_):
+    live_view.unsubscribe(request.sid)
+    frame_channel.close(request.sid)
 
 # Database setup with connection pooling
 def get_db_connection():
@@ -53,16 +317,186 @@ def init_db():
                      (id INTEGER PRIMARY KEY, 
                       timestamp TEXT, 
                       class TEXT, 
-                      confidence REAL)''')
+                      confidence REAL,
+                      model_version TEXT,
+                      session_id TEXT)''')
         conn.execute('''CREATE TABLE IF NOT EXISTS session_summaries
                      (id INTEGER PRIMARY KEY, 
                       timestamp TEXT, 
                       infested_count INTEGER, 
-                      not_infested_count INTEGER)''')
+                      not_infested_count INTEGER,
+                      model_version TEXT,
+                      session_id TEXT)''')
+        conn.execute('''CREATE TABLE IF NOT EXISTS video_detections
+                     (id INTEGER PRIMARY KEY,
+                      job_id TEXT,
+                      video TEXT,
+                      frame_index INTEGER,
+                      timestamp_ms REAL,
+                      class TEXT,
+                      confidence REAL,
+                      x REAL, y REAL, w REAL, h REAL,
+                      model_version TEXT)''')
+        conn.execute("CREATE INDEX IF NOT EXISTS video_detections_job ON video_detections (job_id, frame_index)")
+        # Databases created before model versioning or sessions lack the columns
+        for table in ("detections", "session_summaries"):
+            columns = [row["name"] for row in conn.execute(f"PRAGMA table_info({table})")]
+            for column in ("model_version", "session_id"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
         conn.commit()
 
 init_db()
 
+def save_summary(state, model_version):
+    conn = get_db_connection()
+    try:
+        conn.execute(
+            "INSERT INTO session_summaries (timestamp, infested_count, not_infested_count, model_version, session_id) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (datetime.now().isoformat(), state["infested_count"], state["not_infested_count"], model_version,
+             state["session_id"]))
+        conn.commit()
+    finally:
+        conn.close()
+
+def save_evicted_session(session):
+    # A source that went quiet keeps its counts as a summary
+    try:
+        save_summary(session.to_dict(), session.model_version)
+    except Exception as e:
+        logger.error(f"Database error saving summary of session {session.id}: {e}")
+
+# Counts per detection source (client id, stream or socket), dropped after
+# FAW_SESSION_IDLE_S without frames
+sessions = SessionManager(idle_s=SESSION_IDLE_S, on_evict=save_evicted_session)
+
+class DetectError(JobError):
+    pass
+
+def process_frame(img_bytes, model, tiled, client, key):
+    """Decode, run inference, count and store one /detect frame. Returns
+    the cacheable payload; raises DetectError for client-visible failures."""
+    try:
+        # Raw pixel frames are wrapped as-is; anything else goes through the codec
+        img = decode_frame(img_bytes, tiled)
+    except RawFrameError as e:
+        logger.warning(f"Invalid raw frame: {e}")
+        raise DetectError(str(e), 400)
+    except Exception as e:
+        logger.error(f"Image decoding error: {e}")
+        raise DetectError("Invalid image data", 400)
+
+    if img is None or img.size == 0:
+        logger.warning("Invalid or empty image data")
+        raise DetectError("Invalid or empty image data", 400)
+
+    payload, reused = analyze_frame(img, model, tiled, client, key)
+    if result_cache.enabled:
+        result_cache.put(key, payload)
+    return payload, reused
+
+def analyze_frame(img, model, tiled, client, key=None):
+    """Run inference on a decoded frame, count and store its detections and
+    publish it to the live view. Returns (payload, reused)."""
+    # Run YOLOv8 inference through the batching scheduler, unless the
+    # frame is a near-duplicate of this client's last inferred frame
+    # (on the same model version, at the same resolution and tiling)
+    try:
+        reused = False
+        data = None
+        gate_key = (client, model.version)
+        layout = (img.shape[:2], tiled)
+        if frame_gate.enabled:
+            signature = frame_gate.signature(img)
+            data = frame_gate.lookup(gate_key, signature, layout)
+            reused = data is not None
+        if data is None:
+            data = detect(img, model, tiled)
+            if frame_gate.enabled:
+                frame_gate.store(gate_key, signature, data, layout)
+        results = [results_from_array(img, data, model.names)]
+    except Exception as e:
+        logger.error(f"Inference error: {e}")
+        raise DetectError("Model inference failed", 500)
+
+    # Process results
+    boxes = []
+    classes = []
+    confidences = []
+    current_infested = 0
+    current_not_infested = 0
+
+    if results[0].boxes is not None:
+        boxes = results[0].boxes.xywhn.cpu().numpy().tolist()
+        classes = results[0].boxes.cls.cpu().numpy().tolist()
+        confidences = results[0].boxes.conf.cpu().numpy().tolist()
+
+        # Reused detections were already counted and stored when first inferred
+        if not reused:
+            for cls in classes:
+                if cls == 0:  # Assuming 0 is infested
+                    current_infested += 1
+                else:
+                    current_not_infested += 1
+
+    # Counted against the frame's own session only; a resubmission of the
+    # frame this session counted last (record() returns None) is reused too
+    if sessions.record(client, current_infested, current_not_infested, reused=reused,
+                       model_version=model.version, key=key) is None:
+        reused = True
+
+    if classes and not reused:
+        # Store detections in database
+        try:
+            conn = get_db_connection()
+            timestamp = datetime.now().isoformat()
+            for cls, conf in zip(classes, confidences):
+                conn.execute(
+                    "INSERT INTO detections (timestamp, class, confidence, model_version, session_id) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (timestamp, "infested" if cls == 0 else "not_infested", float(conf), model.version, client)
+                )
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+        finally:
+            conn.close()
+
+    # Annotated on the streaming thread, if anyone is watching
+    live_view.publish(img, data, client)
+
+    payload = {
+        'boxes': boxes,
+        'classes': classes,
+        'confidences': confidences,
+        'model_version': model.version
+    }
+    return payload, reused
+
+def count_shared(payload, client, key):
+    """A result computed for another request (response cache hit or
+    coalesced follower). Sessions other than the one that ran the model
+    count its detections too; the rows are stored only once. Returns
+    `reused`, True when this session had already counted it."""
+    classes = payload['classes']
+    infested = sum(1 for cls in classes if cls == 0)
+    return sessions.record(client, infested, len(classes) - infested,
+                           model_version=payload['model_version'], key=key) is None
+
+def detection_response(payload, reused, client):
+    state = sessions.get(client)
+    return {
+        'session_id': client,
+        'infested_count': state["infested_count"],
+        'not_infested_count': state["not_infested_count"],
+        'boxes': payload['boxes'],
+        'classes': payload['classes'],
+        'confidences': payload['confidences'],
+        'model_version': payload['model_version'],
+        'reused': reused
+    }
+
 @app.route('/detect', methods=['POST'])
 def detect_faw():
     try:
@@ -73,136 +507,411 @@ def detect_faw():
         if not img_bytes or len(img_bytes) == 0:
             logger.warning("No image data received")
             return {"error": "No image data received"}, 400
+        model, error = resolve_model()
+        if error:
+            return error
 
-        try:
-            nparr = np.frombuffer(img_bytes, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if img is None or img.size == 0:
-                logger.warning("Invalid or empty image data")
-                return {"error": "Invalid or empty image data"}, 400
-        except Exception as e:
-            logger.error(f"Image decoding error: {e}")
-            return {"error": "Invalid image data"}, 400
+        tiled = tiling_override()
+        key = cache_key('detect', img_bytes, model, tiled)
+        client = client_id()
 
-        # Run YOLOv8 inference
-        try:
-            results = model(img, imgsz=640, conf=0.5, iou=0.5)
-            if not results or len(results) == 0:
-                return jsonify({
-                    'infested_count': detection_counts["infested"],
-                    'not_infested_count': detection_counts["not_infested"],
-                    'boxes': [],
-                    'classes': [],
-                    'confidences': []
-                })
-        except Exception as e:
-            logger.error(f"Inference error: {e}")
-            return {"error": "Model inference failed"}, 500
-
-        # Process results
-        boxes = []
-        classes = []
-        confidences = []
-        current_infested = 0
-        current_not_infested = 0
-
-        if results[0].boxes is not None:
-            boxes = results[0].boxes.xywhn.cpu().numpy().tolist()
-            classes = results[0].boxes.cls.cpu().numpy().tolist()
-            confidences = results[0].boxes.conf.cpu().numpy().tolist()
-
-            # Update counts
-            for cls in classes:
-                if cls == 0:  # Assuming 0 is infested
-                    current_infested += 1
-                else:
-                    current_not_infested += 1
-
-            # Update global counts in a thread-safe way
-            with threading.Lock():
-                detection_counts["infested"] += current_infested
-                detection_counts["not_infested"] += current_not_infested
-
-            # Store detections in database
+        # Identical bytes seen recently: answer without decoding or inference
+        payload = result_cache.get(key) if result_cache.enabled else None
+        if payload is not None:
+            reused = count_shared(payload, client, key)
+        else:
+            try:
+                ticket = admission.admit(client)
+            except Overloaded as e:
+                return {"error": str(e)}, 429, {"Retry-After": str(OVERLOAD_RETRY_AFTER_S)}
             try:
-                conn = get_db_connection()
-                timestamp = datetime.now().isoformat()
-                for cls, conf in zip(classes, confidences):
-                    conn.execute(
-                        "INSERT INTO detections (timestamp, class, confidence) VALUES (?, ?, ?)",
-                        (timestamp, "infested" if cls == 0 else "not_infested", float(conf))
-                    )
-                conn.commit()
-            except Exception as e:
-                logger.error(f"Database error: {e}")
-            except Exception as e:
-                logger.error(f"Database error: {e}")
+                admission.wait(ticket, timeout=INFERENCE_TIMEOUT_S)
+                # Identical bytes in flight right now: wait for that request instead
+                (payload, reused), leader = inflight.do(
+                    key, lambda: process_frame(img_bytes, model, tiled, client, key), timeout=INFERENCE_TIMEOUT_S)
+            except Superseded as e:
+                return {"status": "superseded", "error": str(e)}, 409
+            except Overloaded as e:
+                return {"error": str(e)}, 503, {"Retry-After": str(OVERLOAD_RETRY_AFTER_S)}
+            except DetectError as e:
+                return {"error": e.message}, e.status
             finally:
-                conn.close()
-
-        # Generate annotated image
-        try:
-            annotated_img = results[0].plot()
-            _, buffer = cv2.imencode('.jpg', annotated_img, [int(cv2.IMWRITE_JPEG_QUALITY), 80])
-            frame_data = base64.b64encode(buffer.tobytes()).decode('utf-8')
-            
-            # Non-blocking frame buffer addition
-            if not frame_buffer.full():
-                frame_buffer.put(frame_data)
-        except Exception as e:
-            logger.error(f"Image processing error: {e}")
+                admission.release(ticket)
+            # Only the request that ran the model counted its detections
+            if not leader:
+                reused = count_shared(payload, client, key)
 
         logger.info(f"Detection completed in {time.time() - start_time:.2f}s")
         
-        return jsonify({
-            'infested_count': detection_counts["infested"],
-            'not_infested_count': detection_counts["not_infested"],
-            'boxes': boxes,
-            'classes': classes,
-            'confidences': confidences
-        })
+        return jsonify(detection_response(payload, reused, client))
 
     except Exception as e:
         logger.error(f"Unexpected error in /detect endpoint: {e}", exc_info=True)
         return {"error": "Internal server error"}, 500
 
-@app.route('/reset_counts', methods=['POST'])
-def reset_counts():
+def detect_job(job, img_bytes, model, tiled, client, key):
+    # Same path as /detect, minus admission control: every submitted job runs
+    payload = result_cache.get(key) if result_cache.enabled else None
+    if payload is not None:
+        return detection_response(payload, count_shared(payload, client, key), client)
+    (payload, reused), leader = inflight.do(
+        key, lambda: process_frame(img_bytes, model, tiled, client, key), timeout=INFERENCE_TIMEOUT_S)
+    if not leader:
+        reused = count_shared(payload, client, key)
+    return detection_response(payload, reused, client)
+
+def deliver_job(job):
+    # Push the finished job to the Socket.IO connection that submitted it
+    if job.sid:
+        socketio.emit('detection_result', job.to_dict(), to=job.sid)
+
+# Background detection jobs (POST /jobs/detect)
+jobs = JobManager(workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING, ttl_s=JOB_TTL_S, on_done=deliver_job)
+
+@app.route('/jobs/detect', methods=['POST'])
+def submit_detect_job():
+    # Accepts the same body and parameters as /detect but answers at once;
+    # the result arrives as a 'detection_result' Socket.IO event for ?sid=
+    # (or X-Socket-Id) and can be polled at GET /jobs/<id>
+    img_bytes = request.data
+    if not img_bytes:
+        return {"error": "No image data received"}, 400
+    model, error = resolve_model()
+    if error:
+        return error
+
+    tiled = tiling_override()
+    key = cache_key('detect', img_bytes, model, tiled)
+    sid = request.args.get('sid') or request.headers.get('X-Socket-Id')
     try:
-        with threading.Lock():
-            total = detection_counts["infested"] + detection_counts["not_infested"]
-            infested_percentage = (detection_counts["infested"] / total) * 100 if total > 0 else 0
-            not_infested_percentage = (detection_counts["not_infested"] / total) * 100 if total > 0 else 0
+        job = jobs.submit('detect', detect_job, img_bytes, model, tiled, client_id(), key, sid=sid)
+    except QueueFull as e:
+        return {"error": str(e)}, 429, {"Retry-After": str(OVERLOAD_RETRY_AFTER_S)}
+    return jsonify({"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}), 202
 
-            try:
-                conn = get_db_connection()
-                conn.execute(
-                    "INSERT INTO session_summaries (timestamp, infested_count, not_infested_count) VALUES (?, ?, ?)",
-                    (datetime.now().isoformat(), detection_counts["infested"], detection_counts["not_infested"]))
-                conn.commit()
-            except Exception as e:
-                logger.error(f"Database error: {e}")
-                return {"error": "Failed to save summary"}, 500
-            finally:
-                conn.close()
+def socket_frame(sid, img_bytes, options):
+    # Same path as a detection job; failures become answers, not exceptions
+    try:
+        model = registry.get(options.get('model'))
+    except UnknownModel as e:
+        return {"status": "error", "error": e.args[0], "error_status": 404}
+    except ModelUnavailable as e:
+        return {"status": "unavailable", "error": str(e), "retry_after": READY_RETRY_AFTER_S}
+    tiled = options.get('tiled')
+    key = cache_key('detect', img_bytes, model, tiled)
+    try:
+        return detect_job(None, img_bytes, model, tiled, options.get('client') or sid, key)
+    except DetectError as e:
+        return {"status": "error", "error": e.message, "error_status": e.status}
+
+def emit_detections(sid, payload):
+    socketio.emit('detections', payload, to=sid)
+
+# Frames sent as 'frame' events on the Socket.IO connection, answered with
+# 'detections' events; the window bounds each connection's frames in flight
+frame_channel = FrameChannel(socket_frame, emit_detections,
+                             max_in_flight=SOCKET_MAX_IN_FLIGHT,
+                             max_queue=ADMISSION_MAX_QUEUE,
+                             workers=JOB_WORKERS)
+
+@socketio.on('connect')
+def on_connect(*_):
+    frame_channel.open(request.sid)
+    emit('frame_window', {"window": frame_channel.window()})
+
+@socketio.on('frame')
+def on_frame(message):
+    # {"seq": n, "image": <binary JPEG or raw frame>, optional "tiled",
+    # "model" and "client"}
+    message = message if isinstance(message, dict) else {}
+    seq = message.get('seq')
+    image = message.get('image')
+    if not isinstance(image, (bytes, bytearray)) or not image:
+        emit('detections', {"seq": seq, "status": "error", "error": "No image data received",
+                            "error_status": 400, "window": frame_channel.window()})
+        return
+    tiled = message.get('tiled')
+    options = {
+        "tiled": None if tiled is None else str(tiled).lower() in ("1", "true", "yes"),
+        "model": message.get('model'),
+        "client": message.get('client')
+    }
+    frame_channel.submit(request.sid, seq, bytes(image), options)
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = jobs.get(job_id) or video_jobs.get(job_id)
+    if job is None:
+        return {"error": f"Unknown or expired job {job_id}"}, 404
+    return jsonify(job.to_dict())
+
+def ingest_frame(stream, img):
+    # Frames pulled from a video feed go straight to inference, counted and
+    # stored like /detect frames; the stream name acts as the client
+    if not model_ready():
+        return False
+    analyze_frame(img, registry.get(), None, f"stream:{stream}")
 
-            detection_counts = {"infested": 0, "not_infested": 0}
+# Server-side ingestion of the drone feed (RTMP/HLS, or a file)
+ingest = IngestManager(ingest_frame, fps=STREAM_FPS)
 
-            return jsonify({
-                "message": "Detection counts reset successfully",
-                "infested_percentage": infested_percentage,
-                "not_infested_percentage": not_infested_percentage
-            })
+@app.route('/streams', methods=['GET'])
+def list_streams():
+    return jsonify(ingest.stats())
+
+# Feeds a client may add: the network protocols of the RTMP/HLS setup, or
+# a recording under VIDEO_DIR. Nothing else reaches FFmpeg
+STREAM_SCHEMES = ("rtmp", "http", "https")
+
+def stream_source(url):
+    if not isinstance(url, str):
+        return None
+    parts = urlsplit(url)
+    if parts.scheme.lower() in STREAM_SCHEMES:
+        return url if parts.netloc else None
+    return recording_path(url)
+
+@app.route('/streams', methods=['POST'])
+def add_stream():
+    body = request.get_json(silent=True) or {}
+    name, url = body.get('name'), body.get('url')
+    if not name or not url:
+        return jsonify({"error": "Missing 'name' or 'url'"}), 400
+    fps = body.get('fps')
+    if fps is not None:
+        try:
+            fps = float(fps)
+        except (TypeError, ValueError):
+            fps = None
+        if fps is None or isinstance(body['fps'], bool) or not math.isfinite(fps) or fps <= 0:
+            return jsonify({"error": "'fps' must be a positive number"}), 400
+    # Missing and forbidden files read alike, so the answer reveals neither
+    source = stream_source(url)
+    if source is None:
+        return jsonify({"error": "'url' must be an rtmp://, http:// or https:// URL or a recording in the video directory"}), 400
+    try:
+        ingestor = ingest.start(name, source, fps=fps)
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 409
+    return jsonify(ingestor.stats()), 201
+
+@app.route('/streams/<name>', methods=['DELETE'])
+def remove_stream(name):
+    try:
+        ingestor = ingest.stop(name)
+    except KeyError:
+        return jsonify({"error": f"Unknown stream {name}"}), 404
+    return jsonify(ingestor.stats())
+
+def remove_upload(path):
+    # Uploaded recordings are only needed while their job runs; annotated
+    # copies stay for /videos/
+    try:
+        os.remove(path)
+    except OSError as e:
+        logger.error(f"Could not remove uploaded video {path}: {e}")
+
+def video_job(job, path, model, output_path, uploaded=False):
+    def write_rows(rows):
+        # One transaction per batch of frames
+        if not rows:
+            return
+        conn = get_db_connection()
+        try:
+            conn.executemany(
+                "INSERT INTO video_detections (job_id, video, frame_index, timestamp_ms, class, confidence, "
+                "x, y, w, h, model_version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(job.id, os.path.basename(path), index, timestamp_ms,
+                  "infested" if cls == 0 else "not_infested", conf, x, y, w, h, model.version)
+                 for index, timestamp_ms, cls, conf, x, y, w, h in rows])
+            conn.commit()
+        finally:
+            conn.close()
+
+    def report(progress):
+        job.progress = progress
+        if job.sid:
+            socketio.emit('video_progress', dict(progress, job_id=job.id), to=job.sid)
+
+    try:
+        pipeline = VideoPipeline(path, model.submit, write_rows,
+                                 sample_fps=VIDEO_FPS,
+                                 output_path=output_path,
+                                 on_progress=report,
+                                 timeout=INFERENCE_TIMEOUT_S,
+                                 decode_workers=VIDEO_DECODE_WORKERS,
+                                 segment_s=VIDEO_SEGMENT_S)
+        result = dict(pipeline.run(), model_version=model.version)
+        if output_path:
+            result['output_url'] = f"/videos/{os.path.basename(output_path)}"
+        return result
+    except ValueError as e:
+        raise DetectError(str(e), 400)
+    finally:
+        if uploaded:
+            remove_upload(path)
+
+# Whole recordings run one (or FAW_VIDEO_WORKERS) at a time
+video_jobs = JobManager(workers=VIDEO_WORKERS, max_pending=16, ttl_s=24 * 3600, on_done=deliver_job,
+                        name="video-job")
+
+def recording_path(name):
+    # Server-side recordings must live under VIDEO_DIR; a relative name is
+    # taken from there. Anything else reads as missing, so the answer does
+    # not reveal which files exist elsewhere
+    if not isinstance(name, str):
+        return None
+    root = os.path.realpath(VIDEO_DIR)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        return None
+    return path
+
+@app.route('/process_video', methods=['POST'])
+def process_video():
+    # A flight recording, uploaded as 'video' or given as a server-side
+    # JSON {"path": ...}; ?annotate=1 also writes an annotated copy
+    model, error = resolve_model()
+    if error:
+        return error
+    body = request.get_json(silent=True) or {}
+    os.makedirs(VIDEO_DIR, exist_ok=True)
+    if 'video' in request.files:
+        file = request.files['video']
+        if file.filename == '':
+            return jsonify({"error": "No selected file"}), 400
+        path = os.path.join(VIDEO_DIR, f"{uuid.uuid4().hex[:8]}-{secure_filename(file.filename)}")
+        file.save(path)
+        uploaded = True
+    elif body.get('path'):
+        path = recording_path(body['path'])
+        if path is None:
+            return jsonify({"error": "Video not found"}), 404
+        uploaded = False
+    else:
+        return jsonify({"error": "No video uploaded"}), 400
+
+    annotate = (request.args.get('annotate') or str(body.get('annotate', ''))).lower() in ("1", "true", "yes")
+    output_path = None
+    if annotate:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        output_path = os.path.join(VIDEO_DIR, f"{stem}-annotated-{uuid.uuid4().hex[:8]}.mp4")
+    sid = request.args.get('sid') or request.headers.get('X-Socket-Id') or body.get('sid')
+    try:
+        job = video_jobs.submit('video', video_job, path, model, output_path, uploaded, sid=sid)
+    except QueueFull as e:
+        if uploaded:
+            remove_upload(path)
+        return {"error": str(e)}, 429, {"Retry-After": str(OVERLOAD_RETRY_AFTER_S)}
+    return jsonify({"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}), 202
+
+@app.route('/videos/<path:name>', methods=['GET'])
+def get_video(name):
+    return send_from_directory(os.path.abspath(VIDEO_DIR), name)
+
+def process_upload(img_bytes, model, tiled, key):
+    nparr = np.frombuffer(img_bytes, np.uint8)
+    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if img is None or img.size == 0:
+        return None
+
+    # Run YOLOv8 inference
+    result = infer(img, model, tiled)
+
+    # Annotate the image with bounding boxes
+    annotated_img = result.plot()
+
+    # Compress and encode as base64
+    _, buffer = cv2.imencode('.jpg', annotated_img)
+    encoded_img = base64.b64encode(buffer).decode('utf-8')
+
+    # Process results
+    names = model.names
+    detections = []
+    for box in result.boxes:
+        class_id = int(box.cls)
+        detections.append({
+            "class": names[class_id],
+            "confidence": float(box.conf),
+            "box": box.xywh.tolist()[0]  # Bounding box coordinates
+        })
+
+    response = {
+        "image": encoded_img,
+        "detections": detections,
+        "model_version": model.version
+    }
+    if result_cache.enabled:
+        result_cache.put(key, response)
+    return response
+
+@app.route('/upload_image', methods=['POST'])
+def upload_image():
+    try:
+        # Check if an image is uploaded
+        if 'image' not in request.files:
+            return jsonify({"error": "No image uploaded"}), 400
+        file = request.files['image']
+        if file.filename == '':
+            return jsonify({"error": "No selected file"}), 400
+        model, error = resolve_model()
+        if error:
+            return error
+
+        # Read the image
+        img_bytes = file.read()
+        tiled = tiling_override()
+        key = cache_key('upload_image', img_bytes, model, tiled)
+        if result_cache.enabled:
+            cached = result_cache.get(key)
+            if cached is not None:
+                return jsonify(cached)
+
+        response, _ = inflight.do(key, lambda: process_upload(img_bytes, model, tiled, key), timeout=INFERENCE_TIMEOUT_S)
+        if response is None:
+            return jsonify({"error": "Invalid or empty image data"}), 400
+        return jsonify(response)
+
+    except Exception as e:
+        logger.error(f"Error in /upload_image endpoint: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/reset_counts', methods=['POST'])
+def reset_counts():
+    # Stores the calling session's counts as a summary and starts it over;
+    # other sessions are untouched
+    try:
+        session_id = client_id()
+        state = sessions.get(session_id)
+        try:
+            save_summary(state, registry.active.version if registry.active else None)
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            return {"error": "Failed to save summary"}, 500
+        # Only once the summary is stored, so a failed save loses nothing
+        sessions.reset(session_id, state)
+
+        return jsonify({
+            "message": "Detection counts reset successfully",
+            "session_id": state["session_id"],
+            "infested_percentage": state["infested_percentage"],
+            "not_infested_percentage": state["not_infested_percentage"]
+        })
     except Exception as e:
         logger.error(f"Error in reset_counts: {e}")
         return {"error": "Internal server error"}, 500
 
 @app.route('/get_summaries', methods=['GET'])
 def get_summaries():
+    # ?client=<session> lists one session's summaries, otherwise all of them
     try:
         conn = get_db_connection()
-        summaries = conn.execute("SELECT * FROM session_summaries ORDER BY timestamp DESC").fetchall()
+        session_id = request.headers.get('X-Client-Id') or request.args.get('client')
+        if session_id:
+            summaries = conn.execute("SELECT * FROM session_summaries WHERE session_id = ? ORDER BY timestamp DESC",
+                                     (session_id,)).fetchall()
+        else:
+            summaries = conn.execute("SELECT * FROM session_summaries ORDER BY timestamp DESC").fetchall()
         return jsonify([dict(row) for row in summaries])
     except Exception as e:
         logger.error(f"Error fetching summaries: {e}")
@@ -213,19 +922,27 @@ def get_summaries():
 @app.route('/get_percentages', methods=['GET'])
 def get_percentages():
     try:
-        with threading.Lock():
-            total = detection_counts["infested"] + detection_counts["not_infested"]
-            infested_percentage = (detection_counts["infested"] / total) * 100 if total > 0 else 0
-            not_infested_percentage = (detection_counts["not_infested"] / total) * 100 if total > 0 else 0
-
-            return jsonify({
-                "infested_percentage": infested_percentage,
-                "not_infested_percentage": not_infested_percentage
-            })
+        state = sessions.get(client_id())
+        return jsonify({
+            "session_id": state["session_id"],
+            "infested_percentage": state["infested_percentage"],
+            "not_infested_percentage": state["not_infested_percentage"]
+        })
     except Exception as e:
         logger.error(f"Error in get_percentages: {e}")
         return {"error": "Internal server error"}, 500
 
+@app.route('/sessions', methods=['GET'])
+def list_sessions():
+    return jsonify(sessions.list())
+
+@app.route('/sessions/<path:session_id>', methods=['DELETE'])
+def remove_session(session_id):
+    try:
+        return jsonify(sessions.remove(session_id))
+    except KeyError:
+        return jsonify({"error": f"Unknown session {session_id}"}), 404
+
 @app.route('/delete_summary/<int:id>', methods=['DELETE'])
 def delete_summary(id):
     try:
@@ -239,21 +956,108 @@ def delete_summary(id):
     finally:
         conn.close()
 
-def stream_frames():
-    while True:
-        try:
-            if not frame_buffer.empty():
-                frame_data = frame_buffer.get()
-                socketio.emit('video_frame', {"image": frame_data})
-            time.sleep(0.033)  # ~30fps
-        except Exception as e:
-            logger.error(f"Error in frame streaming: {e}")
-            time.sleep(1)
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    # Liveness: the process is up and serving, whatever the model is doing
+    active = registry.active
+    return jsonify({
+        "status": "ok",
+        "model_version": active.version if active else None,
+        "uptime_s": round(time.time() - SERVER_STARTED_AT, 1)
+    })
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    active = registry.active
+    body = {
+        "ready": model_ready(),
+        "model_version": active.version if active else None,
+        "backend": INFERENCE_BACKEND,
+        "load_seconds": active.load_seconds if active else None,
+        "warmup_ms": active.warmup_ms if active else [],
+        "models": {entry["version"]: entry["status"] for entry in registry.list()},
+        "queue_depth": registry.pending(),
+        "admitted_frames": admission.pending()
+    }
+    if not model_ready():
+        return jsonify(body), 503, {"Retry-After": str(READY_RETRY_AFTER_S)}
+    return jsonify(body)
+
+@app.route('/models', methods=['GET'])
+def list_models():
+    return jsonify(registry.list())
+
+@app.route('/models', methods=['POST'])
+def add_model():
+    # Register new weights and load them in the background; with
+    # "activate": true traffic switches over once they are warm
+    body = request.get_json(silent=True) or {}
+    weights = body.get('weights')
+    if not weights:
+        return jsonify({"error": "Missing 'weights' path"}), 400
+    try:
+        version = registry.register(weights, body.get('version'))
+        entry = registry.load(version, activate=bool(body.get('activate')))
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        logger.error(f"Error registering model {weights}: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"version": version, "status": entry.status}), 202
+
+@app.route('/models/<version>/activate', methods=['POST'])
+def activate_model(version):
+    try:
+        entry = registry.activate(version)
+    except UnknownModel as e:
+        return jsonify({"error": e.args[0]}), 404
+    except ModelUnavailable as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify({"message": f"Model {version} is now active", "version": entry.version})
+
+@app.route('/models/<version>', methods=['DELETE'])
+def unload_model(version):
+    try:
+        entry = registry.unload(version)
+    except UnknownModel as e:
+        return jsonify({"error": e.args[0]}), 404
+    except ModelUnavailable as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify({"version": entry.version, "status": entry.status})
+
+@app.route('/stats', methods=['GET'])
+def get_stats():
+    return jsonify({
+        "backend": INFERENCE_BACKEND,
+        "engine": engine_config,
+        "models": registry.list(),
+        "decoding": decoder.stats(),
+        "cascade": plant_gate.stats(),
+        "tiling": tiler.stats(),
+        "frame_gate": frame_gate.stats(),
+        "result_cache": result_cache.stats(),
+        "coalescing": inflight.stats(),
+        "admission": admission.stats(),
+        "jobs": jobs.stats(),
+        "video_jobs": video_jobs.stats(),
+        "frame_channel": frame_channel.stats(),
+        "sessions": sessions.stats(),
+        "live_view": live_view.stats(),
+        "streams": ingest.stats()
+    })
 
 if __name__ == '__main__':
     try:
+        # Load and warm the model while the server starts accepting connections
+        threading.Thread(target=load_model, name="model-loader", daemon=True).start()
+
         # Start frame streaming thread
-        threading.Thread(target=stream_frames, daemon=True).start()
+        live_view.start()
+
+        # FAW_STREAMS="drone=rtmp://localhost/live/drone,field2=/path/to/file.mp4"
+        for entry in filter(None, STREAMS.split(',')):
+            name, _, url = entry.partition('=')
+            ingest.start(name.strip(), url.strip())
         
         logger.info("Starting server on http://0.0.0.0:5000")
         socketio.run(app, 
@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class Session:
+    """Detection state of one source: a browser tab, a drone feed or a
+    Socket.IO connection."""
+
+    __slots__ = ("id", "infested", "not_infested", "frames", "reused", "model_version", "last_key", "created_at",
+                 "last_seen")
+
+    def __init__(self, session_id):
+        self.id = session_id
+        self.infested = 0
+        self.not_infested = 0
+        self.frames = 0
+        self.reused = 0
+        self.model_version = None
+        self.last_key = None  # result key of the last counted frame
+        self.created_at = time.time()
+        self.last_seen = time.monotonic()
+
+    def to_dict(self):
+        total = self.infested + self.not_infested
+        return {
+            "session_id": self.id,
+            "infested_count": self.infested,
+            "not_infested_count": self.not_infested,
+            "infested_percentage": self.infested / total * 100 if total > 0 else 0,
+            "not_infested_percentage": self.not_infested / total * 100 if total > 0 else 0,
+            "frames": self.frames,
+            "reused": self.reused,
+            "model_version": self.model_version,
+            "created_at": self.created_at,
+            "idle_s": round(time.monotonic() - self.last_seen, 1)
+        }
+
+
+class SessionManager:
+    """Per-source counters, created on first use.
+
+    Sessions not seen for `idle_s` seconds are evicted on the next call,
+    and beyond `max_sessions` the least recently seen one goes first.
+    `on_evict(session)` is called for evicted sessions that counted
+    anything (the server stores their summary), outside the lock.
+    """
+
+    def __init__(self, idle_s=3600.0, max_sessions=1024, on_evict=None):
+        self.idle_s = idle_s
+        self.max_sessions = max_sessions
+        self.on_evict = on_evict
+        self._sessions = OrderedDict()  # id -> Session, least recently seen first
+        self._lock = threading.Lock()
+        self._counters = {"created": 0, "evicted": 0, "reset": 0}
+
+    def _touch(self, session_id):
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = Session(session_id)
+            self._counters["created"] += 1
+        session.last_seen = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _expire(self):
+        evicted = []
+        cutoff = time.monotonic() - self.idle_s
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_seen >= cutoff and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session.id]
+            self._counters["evicted"] += 1
+            evicted.append(session)
+        return evicted
+
+    def _evicted(self, sessions):
+        if self.on_evict is None:
+            return
+        for session in sessions:
+            if session.infested or session.not_infested:
+                self.on_evict(session)
+
+    def record(self, session_id, infested, not_infested, reused=False, model_version=None, key=None):
+        """Count one analyzed frame; returns the session's state afterwards.
+
+        A frame with the same result `key` (request cache key) as the one
+        this session counted last is a resubmission: it counts as reused
+        and None is returned.
+        """
+        with self._lock:
+            session = self._touch(session_id)
+            session.frames += 1
+            if key is not None and key == session.last_key:
+                session.reused += 1
+                return None
+            if key is not None:
+                session.last_key = key
+            if reused:
+                session.reused += 1
+            session.infested += infested
+            session.not_infested += not_infested
+            if model_version is not None:
+                session.model_version = model_version
+            state = session.to_dict()
+            evicted = self._expire()
+        self._evicted(evicted)
+        return state
+
+    def get(self, session_id):
+        """State of a session; an unknown one reads as empty."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            state = (session or Session(session_id)).to_dict()
+            evicted = self._expire()
+        self._evicted(evicted)
+        return state
+
+    def reset(self, session_id, state):
+        """Start a session over from `state`, a get() snapshot that was
+        saved; frames counted since then stay on the new counters."""
+        with self._lock:
+            session = self._touch(session_id)
+            session.infested = max(0, session.infested - state["infested_count"])
+            session.not_infested = max(0, session.not_infested - state["not_infested_count"])
+            session.frames = max(0, session.frames - state["frames"])
+            session.reused = max(0, session.reused - state["reused"])
+            self._counters["reset"] += 1
+
+    def remove(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id)
+            return session.to_dict()
+
+    def list(self):
+        with self._lock:
+            evicted = self._expire()
+            states = [session.to_dict() for session in reversed(self._sessions.values())]
+        self._evicted(evicted)
+        return states
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active": len(self._sessions),
+                "idle_s": self.idle_s,
+                "max_sessions": self.max_sessions,
+                **self._counters
+            }
@@ -4,6 +4,7 @@ import Home from './pages/Home';
 import About from './pages/About';
 import Team from './pages/Team';
 import Summary from './pages/Summary';
+import { sessionId } from './session';
 import './App.css';
 
 function App() {
@@ -12,7 +13,8 @@ function App() {
 
   const resetCounts = async () => {
     try {
-      const response = await fetch('http://localhost:5000/reset_counts', {
+      // Only this tab's counts are reset
+      const response = await fetch(`http://localhost:5000/reset_counts?client=${sessionId}`, {
         method: 'POST',
       });
       const data = await response.json();
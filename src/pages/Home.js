@@ -1,5 +1,7 @@
 import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
+import { io } from 'socket.io-client';
+import { sessionId } from '../session';
 import './Home.css';
 import './Summary.css';
 
@@ -15,6 +17,8 @@ function Home() {
   const iframeRef = useRef(null);
   const boxesRef = useRef([]);
   const classesRef = useRef([]);
+  // Identifies this tab's stream to the server (counts, duplicate-frame gate)
+  const clientIdRef = useRef(sessionId);
 
   const statusText = isServerReachable && isScreenCaptured
     ? 'Connected ✅'
@@ -29,11 +33,7 @@ function Home() {
   useEffect(() => {
     const checkServer = async () => {
       try {
-        const response = await fetch('http://localhost:5000/detect', {
-          method: 'POST',
-          headers: { 'Content-Type': 'application/octet-stream' },
-          body: new Blob([]),
-        });
+        const response = await fetch('http://localhost:5000/healthz');
 
         if (response.ok) {
           setIsServerReachable(true);
@@ -161,45 +161,67 @@ function Home() {
   
 
   useEffect(() => {
+    // One persistent connection for all frames: each 'frame' is answered by
+    // a 'detections' event with the same seq, and the server decides how
+    // many frames may be in flight at once (its 'window')
+    const socket = io('http://localhost:5000');
+    let nextSeq = 0;
+    let lastSeq = -1;
+    let inFlight = 0;
+    let windowSize = 1;
+
+    socket.on('frame_window', (data) => {
+      windowSize = data.window;
+    });
+
+    socket.on('detections', (result) => {
+      inFlight = Math.max(0, inFlight - 1);
+      windowSize = result.window || windowSize;
+      setIsServerReachable(true);
+      // Busy, overloaded or failed frames, and answers overtaken by a
+      // newer frame's: keep the last boxes
+      if (result.status !== 'ok' || result.seq < lastSeq) return;
+      lastSeq = result.seq;
+      boxesRef.current = result.boxes || [];
+      classesRef.current = result.classes || [];
+      updateCounts(result);
+    });
+
+    socket.on('disconnect', () => {
+      inFlight = 0;
+      setIsServerReachable(false);
+    });
+
     const captureAndDetect = () => {
       const video = videoCaptureRef.current;
       const tempCanvas = document.createElement('canvas');
       const tempCtx = tempCanvas.getContext('2d');
 
       if (!video || video.readyState < 2) return;
+      // Wait for an answer to free a slot rather than queueing frames
+      if (!socket.connected || inFlight >= windowSize) return;
 
       tempCanvas.width = video.videoWidth;
       tempCanvas.height = video.videoHeight;
       tempCtx.drawImage(video, 0, 0, tempCanvas.width, tempCanvas.height);
 
+      inFlight += 1;
       tempCanvas.toBlob(async (blob) => {
-        if (blob && blob.size > 0) {
-          try {
-            const response = await fetch('http://localhost:5000/detect', {
-              method: 'POST',
-              headers: {
-                'Content-Type': 'application/octet-stream',
-              },
-              body: blob,
-            });
-            const result = await response.json();
-            boxesRef.current = result.boxes || [];
-            classesRef.current = result.classes || [];
-            updateCounts(result);
-
-            // Set server reachable because the request succeeded
-            setIsServerReachable(true);
-          } catch (err) {
-            console.error('Error sending frame to server:', err);
-            setIsServerReachable(false);
-          }
+        if (!blob || blob.size === 0) {
+          inFlight -= 1;
+          return;
         }
+        const image = await blob.arrayBuffer();
+        socket.emit('frame', { seq: nextSeq++, image, client: clientIdRef.current });
       }, 'image/jpeg');
     };
 
     // Set interval to 3 seconds (3000 ms)
     const intervalId = setInterval(captureAndDetect, 3000);
-    return () => clearInterval(intervalId);
+    return () => {
+      clearInterval(intervalId);
+      socket.disconnect();
+    };
   }, []);
 
   const drawBoxes = (ctx) => {
@@ -0,0 +1,7 @@
+// Identifies this tab to the server: its detection counts, duplicate-frame
+// gate and summaries are kept per session. Kept for the life of the tab,
+// so a reload carries on counting where it left off
+const KEY = 'fawSessionId';
+
+export const sessionId = sessionStorage.getItem(KEY) || Math.random().toString(36).slice(2);
+sessionStorage.setItem(KEY, sessionId);
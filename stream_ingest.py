@@ -0,0 +1,212 @@
+import os
+import threading
+import time
+import logging
+
+import cv2
+
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+LAG_MS_BUCKETS = (50, 100, 250, 500, 1000, 2000, 5000, 10000)
+OPEN_TIMEOUT_MS = 10000
+
+
+class StreamIngestor:
+    """Pulls a video feed on the server and feeds sampled frames to `handle`.
+
+    `url` is anything OpenCV's FFmpeg backend opens: the nginx RTMP
+    application (rtmp://host/live/<key>), its HLS playlist
+    (http://host:8000/live/<key>.m3u8) or a local video file, which is
+    paced at its own frame rate and looped to stand in for a live feed.
+
+    A reader thread keeps up with the source and offers one frame every
+    1/`fps` seconds to a single-slot mailbox; a detection thread calls
+    `handle(name, frame)` on the newest one (a False return counts the
+    frame as skipped, e.g. while no model is ready). When detection is slower than
+    `fps`, older sampled frames are replaced (counted as dropped) rather
+    than queued, so lag stays bounded. Lost connections are retried with
+    exponential backoff up to `max_backoff_s`.
+    """
+
+    def __init__(self, name, url, handle, fps=1.0, backoff_s=1.0, max_backoff_s=30.0):
+        self.name = name
+        self.url = url
+        self.handle = handle
+        self.fps = fps
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.is_file = os.path.isfile(url)
+        self.status = "starting"
+        self.last_error = None
+        self.source_fps = None
+        self.lag_ms = Histogram(LAG_MS_BUCKETS)
+        self._counters = {"read": 0, "sampled": 0, "processed": 0, "skipped": 0, "dropped": 0, "errors": 0, "reconnects": 0}
+        self._latest = None  # (frame, read_at)
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self._threads = [threading.Thread(target=self._read_loop, name=f"ingest-read-{self.name}", daemon=True),
+                         threading.Thread(target=self._detect_loop, name=f"ingest-detect-{self.name}", daemon=True)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._ready.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self.status = "stopped"
+
+    def _open(self):
+        capture = cv2.VideoCapture(self.url, cv2.CAP_FFMPEG, [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, OPEN_TIMEOUT_MS])
+        if not capture.isOpened():
+            capture.release()
+            raise ConnectionError(f"Cannot open {self.url}")
+        # Live sources: keep OpenCV's internal queue short so frames stay fresh
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        self.source_fps = round(fps, 2) if fps and fps < 1000 else None
+        return capture
+
+    def _read_loop(self):
+        backoff = self.backoff_s
+        while not self._stop.is_set():
+            try:
+                self.status = "connecting"
+                capture = self._open()
+            except Exception as e:
+                self._on_error(e)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff_s)
+                continue
+
+            self.status = "streaming"
+            try:
+                frames = self._read_frames(capture)
+            except Exception as e:
+                # A failed read must not end the ingestor: back off and reopen
+                self._on_error(e)
+                frames = 0
+            finally:
+                capture.release()
+            if frames:
+                backoff = self.backoff_s
+            if not self._stop.is_set():
+                with self._lock:
+                    self._counters["reconnects"] += 1
+                if self.is_file and frames:
+                    logger.info(f"Stream {self.name}: end of {self.url}, restarting it")
+                else:
+                    self.status = "reconnecting"
+                    logger.warning(f"Stream {self.name}: lost {self.url}, reconnecting")
+                    self._stop.wait(backoff)
+                    if not frames:
+                        backoff = min(backoff * 2, self.max_backoff_s)
+
+    def _read_frames(self, capture):
+        interval = 1.0 / self.fps if self.fps > 0 else 0.0
+        frame_period = 1.0 / self.source_fps if self.is_file and self.source_fps else 0.0
+        next_sample = time.monotonic()
+        next_frame = time.monotonic()
+        frames = 0
+        while not self._stop.is_set():
+            if frame_period:
+                # Files play back in real time, like the live feed they replace
+                next_frame += frame_period
+                delay = next_frame - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            # grab() only demuxes and decodes; skipped frames are never converted
+            if not capture.grab():
+                return frames
+            frames += 1
+            now = time.monotonic()
+            with self._lock:
+                self._counters["read"] += 1
+            if now < next_sample:
+                continue
+            next_sample = max(next_sample + interval, now)
+            ok, frame = capture.retrieve()
+            if not ok:
+                return frames
+            with self._lock:
+                self._counters["sampled"] += 1
+                if self._latest is not None:
+                    self._counters["dropped"] += 1
+                self._latest = (frame, now)
+            self._ready.set()
+        return frames
+
+    def _detect_loop(self):
+        while not self._stop.is_set():
+            self._ready.wait()
+            with self._lock:
+                latest, self._latest = self._latest, None
+                self._ready.clear()
+            if latest is None:
+                continue
+            frame, read_at = latest
+            try:
+                handled = self.handle(self.name, frame) is not False
+                with self._lock:
+                    self._counters["processed" if handled else "skipped"] += 1
+            except Exception as e:
+                self._on_error(e)
+            self.lag_ms.observe((time.monotonic() - read_at) * 1000.0)
+
+    def _on_error(self, e):
+        self.last_error = str(e)
+        with self._lock:
+            self._counters["errors"] += 1
+        logger.error(f"Stream {self.name}: {e}")
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            "name": self.name,
+            "url": self.url,
+            "status": self.status,
+            "fps": self.fps,
+            "source_fps": self.source_fps,
+            "last_error": self.last_error,
+            **counters,
+            "drop_rate": counters["dropped"] / counters["sampled"] if counters["sampled"] else 0.0,
+            "lag_ms": self.lag_ms.snapshot()
+        }
+
+
+class IngestManager:
+    """Named StreamIngestors sharing one frame handler."""
+
+    def __init__(self, handle, fps=1.0):
+        self.handle = handle
+        self.fps = fps
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def start(self, name, url, fps=None):
+        with self._lock:
+            if name in self._streams:
+                raise KeyError(f"Stream {name} already exists")
+            ingestor = StreamIngestor(name, url, self.handle, fps=fps or self.fps)
+            self._streams[name] = ingestor
+        logger.info(f"Ingesting stream {name} from {url} at {ingestor.fps} fps")
+        return ingestor.start()
+
+    def stop(self, name):
+        with self._lock:
+            ingestor = self._streams.pop(name)
+        ingestor.stop()
+        return ingestor
+
+    def stats(self):
+        with self._lock:
+            streams = list(self._streams.values())
+        return [ingestor.stats() for ingestor in streams]
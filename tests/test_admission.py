@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from admission import AdmissionControl, Overloaded, Superseded
+
+
+def test_first_frame_runs_at_once():
+    admission = AdmissionControl()
+    ticket = admission.admit("a")
+    admission.wait(ticket, timeout=0)
+    assert admission.pending() == 1
+    admission.release(ticket)
+    assert admission.pending() == 0
+    assert admission.stats()["streams"] == 0
+
+
+def test_newer_frame_supersedes_the_waiting_one():
+    admission = AdmissionControl()
+    running = admission.admit("a")
+    older = admission.admit("a")
+    newer = admission.admit("a")
+    with pytest.raises(Superseded):
+        admission.wait(older, timeout=0)
+    assert admission.pending() == 2
+
+    admission.release(running)
+    admission.wait(newer, timeout=0)
+    admission.release(newer)
+    stats = admission.stats()
+    assert stats["superseded"] == 1
+    assert stats["queued"] == 0
+    assert stats["streams"] == 0
+
+
+def test_waiting_frame_runs_when_the_previous_one_is_released():
+    admission = AdmissionControl()
+    running = admission.admit("a")
+    waiting = admission.admit("a")
+    done = []
+    thread = threading.Thread(target=lambda: done.append(admission.wait(waiting, timeout=5)))
+    thread.start()
+    admission.release(running)
+    thread.join(5)
+    assert done == [None]
+    admission.release(waiting)
+    assert admission.pending() == 0
+
+
+def test_clients_do_not_wait_for_each_other():
+    admission = AdmissionControl()
+    a = admission.admit("a")
+    b = admission.admit("b")
+    admission.wait(a, timeout=0)
+    admission.wait(b, timeout=0)
+    assert admission.stats()["streams"] == 2
+
+
+def test_frames_beyond_max_queue_are_rejected():
+    admission = AdmissionControl(max_queue=3)
+    admission.admit("a")
+    admission.admit("a")
+    admission.admit("b")
+    with pytest.raises(Overloaded):
+        admission.admit("c")
+    # Replacing a waiting frame does not add to the queue
+    admission.admit("a")
+    assert admission.pending() == 3
+    assert admission.stats()["rejected"] == 1
+
+
+def test_timed_out_frame_leaves_the_queue():
+    admission = AdmissionControl()
+    running = admission.admit("a")
+    waiting = admission.admit("a")
+    with pytest.raises(Overloaded):
+        admission.wait(waiting, timeout=0.01)
+    assert admission.pending() == 1
+    assert admission.stats()["timed_out"] == 1
+    # The client's next frame takes the free place behind the running one
+    following = admission.admit("a")
+    admission.release(running)
+    admission.wait(following, timeout=0)
+
+
+def test_releasing_a_superseded_ticket_is_a_no_op():
+    admission = AdmissionControl()
+    running = admission.admit("a")
+    older = admission.admit("a")
+    admission.admit("a")
+    admission.release(older)
+    assert admission.pending() == 2
+    admission.release(running)
+    assert admission.pending() == 1
@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+from coalescing import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", work)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("k", work, timeout=5)))
+                 for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    while flight.stats()["coalesced"] < 3:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results, key=lambda r: not r[1]) == [("result", True)] + [("result", False)] * 3
+    stats = flight.stats()
+    assert stats["executions"] == 1
+    assert stats["coalesced_rate"] == 0.75
+    assert stats["in_flight"] == 0
+
+
+def test_followers_get_the_leaders_exception():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", fail, timeout=5)
+        except ValueError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    while flight.stats()["coalesced"] < 1:
+        threading.Event().wait(0.01)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert errors == ["boom", "boom"]
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_key_is_released_after_the_leader_finishes():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == (1, True)
+    assert flight.do("k", lambda: 2) == (2, True)
+    with pytest.raises(KeyError):
+        flight.do("k", lambda: {}["missing"])
+    assert flight.do("k", lambda: 3) == (3, True)
+    assert flight.stats()["executions"] == 4
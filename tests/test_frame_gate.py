@@ -0,0 +1,56 @@
+import numpy as np
+
+from frame_gate import FrameGate
+
+DETECTIONS = np.array([[10, 10, 50, 50, 0.9, 0]], np.float32)
+
+
+def scene(shape):
+    y, x = np.mgrid[0:shape[0], 0:shape[1]]
+    img = np.zeros(shape + (3,), np.uint8)
+    img[..., 1] = (x * 255 // shape[1]).astype(np.uint8)
+    img[..., 2] = (y * 255 // shape[0]).astype(np.uint8)
+    return img
+
+
+def test_near_duplicate_reuses_detections():
+    gate = FrameGate(threshold=3.0)
+    img = scene((480, 640))
+    gate.store("a", gate.signature(img), DETECTIONS, ((480, 640), None))
+    assert gate.lookup("a", gate.signature(img.copy()), ((480, 640), None)) is DETECTIONS
+    assert gate.stats()["skips"] == 1
+
+
+def test_different_client_misses():
+    gate = FrameGate(threshold=3.0)
+    img = scene((480, 640))
+    gate.store("a", gate.signature(img), DETECTIONS, ((480, 640), None))
+    assert gate.lookup("b", gate.signature(img), ((480, 640), None)) is None
+
+
+def test_same_scene_at_another_resolution_misses():
+    # Stored boxes are in pixels of the 640x480 frame
+    gate = FrameGate(threshold=3.0)
+    gate.store("a", gate.signature(scene((480, 640))), DETECTIONS, ((480, 640), None))
+    assert gate.lookup("a", gate.signature(scene((720, 960))), ((720, 960), None)) is None
+
+
+def test_tiling_change_misses():
+    gate = FrameGate(threshold=3.0)
+    img = scene((480, 640))
+    gate.store("a", gate.signature(img), DETECTIONS, ((480, 640), None))
+    assert gate.lookup("a", gate.signature(img), ((480, 640), True)) is None
+
+
+def test_changed_frame_misses():
+    gate = FrameGate(threshold=3.0)
+    img = scene((480, 640))
+    gate.store("a", gate.signature(img), DETECTIONS, ((480, 640), None))
+    assert gate.lookup("a", gate.signature(255 - img), ((480, 640), None)) is None
+
+
+def test_entries_expire():
+    gate = FrameGate(threshold=3.0, max_age_s=0)
+    img = scene((480, 640))
+    gate.store("a", gate.signature(img), DETECTIONS, ((480, 640), None))
+    assert gate.lookup("a", gate.signature(img), ((480, 640), None)) is None
@@ -0,0 +1,111 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import model_registry
+from batching import BatchScheduler
+from model_registry import ModelRegistry, ModelUnavailable
+
+
+class FakeEngine:
+    names = {0: "infested", 1: "not_infested"}
+
+    def __init__(self, weights):
+        self.weights = weights
+        self.gate = threading.Event()
+        self.gate.set()
+        self.closed = False
+
+    def predict(self, images):
+        self.gate.wait(5)
+        return [np.zeros((0, 6), np.float32) for _ in images]
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fast_drain(monkeypatch):
+    monkeypatch.setattr(model_registry, "DRAIN_IDLE_S", 0.05)
+
+
+def make_registry(tmp_path, max_resident):
+    registry = ModelRegistry(FakeEngine, lambda engine: BatchScheduler(engine.predict, max_wait_ms=0),
+                             max_resident=max_resident, warmup_runs=1, imgsz=32, timeout=5)
+    for name in ("v1", "v2"):
+        weights = tmp_path / f"{name}.pt"
+        weights.write_bytes(name.encode())
+        registry.register(str(weights), version=name)
+    return registry
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def statuses(registry):
+    return {entry["version"]: entry["status"] for entry in registry.list()}
+
+
+def test_first_ready_version_becomes_active(tmp_path):
+    registry = make_registry(tmp_path, max_resident=2)
+    registry.load("v1", background=False)
+    assert registry.active.version == "v1"
+    assert registry.get().ready
+
+
+def test_loaded_version_is_not_evicted_before_activation(tmp_path):
+    registry = make_registry(tmp_path, max_resident=1)
+    registry.load("v1", background=False)
+    registry.load("v2", background=False)
+    assert statuses(registry) == {"v1": "ready", "v2": "ready"}
+    registry.activate("v2")
+    assert registry.active.version == "v2"
+    wait_for(lambda: statuses(registry)["v1"] == "unloaded")
+
+
+def test_previous_version_finishes_its_frames_before_release(tmp_path):
+    registry = make_registry(tmp_path, max_resident=1)
+    old = registry.load("v1", background=False)
+    old.engine.gate.clear()
+    engine = old.engine
+    future = old.submit(np.zeros((32, 32, 3), np.uint8))
+
+    registry.load("v2", activate=True, background=False)
+    assert registry.active.version == "v2"
+    assert statuses(registry)["v1"] == "draining"
+    with pytest.raises(ModelUnavailable):
+        registry.activate("v1")
+
+    engine.gate.set()
+    assert len(future.result(timeout=5)) == 0
+    wait_for(lambda: statuses(registry)["v1"] == "unloaded")
+    assert engine.closed
+
+
+def test_pinning_a_draining_version_takes_it_back(tmp_path):
+    registry = make_registry(tmp_path, max_resident=2)
+    registry.load("v1", background=False)
+    entry = registry.load("v2", background=False)
+    entry.engine.gate.clear()
+    future = entry.submit(np.zeros((32, 32, 3), np.uint8))
+    registry.unload("v2")
+    assert statuses(registry)["v2"] == "draining"
+    assert registry.get("v2") is entry
+    entry.engine.gate.set()
+    future.result(timeout=5)
+    time.sleep(0.2)
+    assert statuses(registry)["v2"] == "ready"
+    assert not entry.engine.closed
+
+
+def test_active_version_cannot_be_unloaded(tmp_path):
+    registry = make_registry(tmp_path, max_resident=2)
+    registry.load("v1", background=False)
+    with pytest.raises(ModelUnavailable):
+        registry.unload("v1")
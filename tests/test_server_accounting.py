@@ -0,0 +1,88 @@
+import importlib
+import sqlite3
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("ultralytics")
+
+
+class FakeModel:
+    version = "v1"
+    names = {0: "infested", 1: "not_infested"}
+
+
+DETECTIONS = np.array([[10, 10, 50, 50, 0.9, 0], [60, 60, 90, 90, 0.8, 1]], np.float32)
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    # Without the response cache and frame gate every request reaches
+    # analyze_frame; detections.db is created in the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("FAW_RESULT_CACHE_MB", "0")
+    monkeypatch.setenv("FAW_FRAME_GATE_THRESHOLD", "0")
+    sys.modules.pop("server", None)
+    module = importlib.import_module("server")
+    monkeypatch.setattr(module, "resolve_model", lambda: (FakeModel(), None))
+    monkeypatch.setattr(module, "detect", lambda img, model, tiled=None: DETECTIONS.copy())
+    yield module
+    sys.modules.pop("server", None)
+
+
+def frame(seed):
+    img = np.random.default_rng(seed).integers(0, 255, (120, 160, 3), dtype=np.uint8)
+    return cv2.imencode(".jpg", img)[1].tobytes()
+
+
+def post(client, body, session):
+    response = client.post("/detect", data=body, headers={"X-Client-Id": session})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def stored_rows(session):
+    conn = sqlite3.connect("detections.db")
+    try:
+        return conn.execute("SELECT COUNT(*) FROM detections WHERE session_id = ?", (session,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_resubmitted_frame_is_counted_and_stored_once(server):
+    client = server.app.test_client()
+    body = frame(0)
+    answers = [post(client, body, "q") for _ in range(3)]
+    assert [answer["reused"] for answer in answers] == [False, True, True]
+    assert answers[-1]["infested_count"] == 1
+    assert answers[-1]["not_infested_count"] == 1
+    assert stored_rows("q") == 2
+
+
+def test_alternating_frames_are_all_counted(server):
+    client = server.app.test_client()
+    a, b = frame(0), frame(1)
+    answers = [post(client, body, "q") for body in (a, b, a)]
+    assert [answer["reused"] for answer in answers] == [False, False, False]
+    assert answers[-1]["infested_count"] == 3
+    assert stored_rows("q") == 6
+
+
+def test_reset_keeps_frames_counted_after_the_snapshot(server, monkeypatch):
+    client = server.app.test_client()
+    post(client, frame(0), "q")
+    saved = server.save_summary
+
+    def save_then_count(*args, **kwargs):
+        # A frame arriving while the summary is written belongs to the next one
+        result = saved(*args, **kwargs)
+        server.sessions.record("q", 1, 0, key="late")
+        return result
+
+    monkeypatch.setattr(server, "save_summary", save_then_count)
+    assert client.post("/reset_counts", headers={"X-Client-Id": "q"}).status_code == 200
+    state = server.sessions.get("q")
+    assert (state["infested_count"], state["not_infested_count"]) == (1, 0)
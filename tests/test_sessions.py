@@ -0,0 +1,103 @@
+from sessions import SessionManager
+
+
+def test_record_counts_frames():
+    sessions = SessionManager()
+    state = sessions.record("a", 2, 1, model_version="v1", key="k1")
+    assert state["infested_count"] == 2
+    assert state["not_infested_count"] == 1
+    assert state["frames"] == 1
+    assert state["reused"] == 0
+    assert state["model_version"] == "v1"
+
+
+def test_resubmitted_frame_is_not_counted_again():
+    sessions = SessionManager()
+    sessions.record("a", 1, 1, key="k1")
+    assert sessions.record("a", 1, 1, key="k1") is None
+    assert sessions.record("a", 1, 1, key="k1") is None
+    state = sessions.get("a")
+    assert (state["infested_count"], state["not_infested_count"]) == (1, 1)
+    assert state["frames"] == 3
+    assert state["reused"] == 2
+
+
+def test_frames_without_key_always_count():
+    sessions = SessionManager()
+    sessions.record("a", 1, 0)
+    sessions.record("a", 1, 0)
+    assert sessions.get("a")["infested_count"] == 2
+
+
+def test_alternating_frames_all_count():
+    # A -> B -> A: only a repeat of the last counted frame is a resubmission
+    sessions = SessionManager()
+    for key in ("A", "B", "A"):
+        assert sessions.record("a", 1, 0, key=key) is not None
+    state = sessions.get("a")
+    assert state["infested_count"] == 3
+    assert state["reused"] == 0
+
+
+def test_same_frame_counts_once_per_session():
+    sessions = SessionManager()
+    sessions.record("a", 1, 0, key="k1")
+    assert sessions.record("b", 1, 0, key="k1") is not None
+    assert sessions.record("a", 1, 0, key="k1") is None
+    assert sessions.get("a")["infested_count"] == 1
+    assert sessions.get("b")["infested_count"] == 1
+
+
+def test_reused_frame_counts_as_reused():
+    sessions = SessionManager()
+    state = sessions.record("a", 0, 0, reused=True, key="k1")
+    assert state["frames"] == 1
+    assert state["reused"] == 1
+
+
+def test_reset_subtracts_saved_snapshot():
+    sessions = SessionManager()
+    sessions.record("a", 2, 1, key="k1")
+    snapshot = sessions.get("a")
+    # Counted after the snapshot was taken, while its summary was saved
+    sessions.record("a", 1, 0, key="k2")
+    sessions.reset("a", snapshot)
+    state = sessions.get("a")
+    assert (state["infested_count"], state["not_infested_count"]) == (1, 0)
+    assert state["frames"] == 1
+    assert sessions.stats()["reset"] == 1
+
+
+def test_reset_of_everything_counted_starts_from_zero():
+    sessions = SessionManager()
+    sessions.record("a", 2, 1)
+    sessions.reset("a", sessions.get("a"))
+    state = sessions.get("a")
+    assert (state["infested_count"], state["not_infested_count"], state["frames"]) == (0, 0, 0)
+
+
+def test_unknown_session_reads_as_empty():
+    sessions = SessionManager()
+    state = sessions.get("nobody")
+    assert state["infested_count"] == 0
+    assert state["infested_percentage"] == 0
+    assert sessions.stats()["active"] == 0
+
+
+def test_idle_sessions_are_evicted_with_summary():
+    evicted = []
+    sessions = SessionManager(idle_s=0, on_evict=evicted.append)
+    sessions.record("a", 1, 0)
+    sessions.record("b", 0, 0)
+    sessions.list()
+    assert [session.id for session in evicted] == ["a"]
+    assert sessions.stats()["evicted"] == 2
+
+
+def test_least_recently_seen_session_goes_first():
+    sessions = SessionManager(max_sessions=2)
+    sessions.record("a", 1, 0)
+    sessions.record("b", 1, 0)
+    sessions.record("a", 1, 0)
+    sessions.record("c", 1, 0)
+    assert sorted(state["session_id"] for state in sessions.list()) == ["a", "c"]
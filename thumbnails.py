@@ -0,0 +1,11 @@
+import cv2
+
+SUBSAMPLE_TARGET = 256  # stride-subsample to about this many pixels before resizing
+
+
+def thumbnail(img, size):
+    """Small `size` (width, height) copy of a BGR frame for cheap per-frame
+    checks. Large frames are stride-subsampled first, so the area resize
+    reads a few hundred pixels per side whatever the input resolution."""
+    step = max(1, max(img.shape[:2]) // SUBSAMPLE_TARGET)
+    return cv2.resize(img[::step, ::step], size, interpolation=cv2.INTER_AREA)
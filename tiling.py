@@ -0,0 +1,111 @@
+import threading
+
+import numpy as np
+
+from backends import nms
+from inference import EMPTY_DETECTIONS
+from metrics import Histogram
+
+TILE_COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+TILE_GROWTH = 1.25
+
+
+def tile_starts(length, tile, stride):
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile, stride))
+    starts.append(length - tile)  # last tile flush with the edge
+    return starts
+
+
+def plan_tiles(height, width, tile_size, overlap, max_tiles):
+    """Overlapping (x, y, w, h) windows covering the image. If more than
+    `max_tiles` would be needed, the window grows (and the model downscales
+    each tile) until the grid fits, so latency stays bounded."""
+    tile = tile_size
+    while True:
+        stride = max(1, int(tile * (1 - overlap)))
+        xs = tile_starts(width, tile, stride)
+        ys = tile_starts(height, tile, stride)
+        if len(xs) * len(ys) <= max_tiles or tile >= max(height, width):
+            break
+        tile = int(tile * TILE_GROWTH)
+    return [(x, y, min(tile, width), min(tile, height)) for y in ys for x in xs]
+
+
+def merge_detections(per_tile, tiles, iou):
+    """Shift per-tile (N, 6) detections to global pixels and suppress
+    duplicates from overlapping tiles with class-aware NMS."""
+    shifted = []
+    for data, (x, y, _, _) in zip(per_tile, tiles):
+        if len(data):
+            data = data.copy()
+            data[:, [0, 2]] += x
+            data[:, [1, 3]] += y
+            shifted.append(data)
+    if not shifted:
+        return EMPTY_DETECTIONS
+    merged = np.concatenate(shifted)
+    keep = nms(merged[:, :4], merged[:, 4], merged[:, 5], 0.0, iou)
+    return merged[keep]
+
+
+class TiledDetector:
+    """Sliced inference for large stills.
+
+    Tiles are submitted together through the `submit` function passed to
+    detect() (a model's batching scheduler), so they run as one batch when
+    the batch size allows.
+    `mode` is "off", "auto" (tile images whose longer side exceeds
+    `min_side`) or "always"; requests can override it per call.
+    """
+
+    def __init__(self, mode="off", tile_size=640, overlap=0.2, max_tiles=16, min_side=1280,
+                 iou=0.5, full_frame=False):
+        self.mode = mode
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.max_tiles = max(1, max_tiles)
+        self.min_side = min_side
+        self.iou = iou
+        self.full_frame = full_frame
+        self.tiles_per_frame = Histogram(TILE_COUNT_BUCKETS)
+        self._tiled_frames = 0
+        self._lock = threading.Lock()
+
+    def should_tile(self, img, override=None):
+        return self.should_tile_size(*img.shape[:2], override)
+
+    def should_tile_size(self, height, width, override=None):
+        if override is not None:
+            return override and max(height, width) > self.tile_size
+        if self.mode == "always":
+            return max(height, width) > self.tile_size
+        return self.mode == "auto" and max(height, width) > self.min_side
+
+    def detect(self, img, submit, timeout=None):
+        h, w = img.shape[:2]
+        tiles = plan_tiles(h, w, self.tile_size, self.overlap, self.max_tiles)
+        crops = [img[y:y + th, x:x + tw] for x, y, tw, th in tiles]
+        if self.full_frame:
+            # Extra downscaled whole-frame pass catches objects larger than a tile
+            tiles.append((0, 0, w, h))
+            crops.append(img)
+
+        futures = [submit(crop) for crop in crops]
+        per_tile = [future.result(timeout=timeout) for future in futures]
+
+        self.tiles_per_frame.observe(len(crops))
+        with self._lock:
+            self._tiled_frames += 1
+        return merge_detections(per_tile, tiles, self.iou)
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "tile_size": self.tile_size,
+            "overlap": self.overlap,
+            "max_tiles": self.max_tiles,
+            "tiled_frames": self._tiled_frames,
+            "tiles_per_frame": self.tiles_per_frame.snapshot()
+        }
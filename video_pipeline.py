@@ -0,0 +1,392 @@
+import bisect
+import multiprocessing as mp
+import shutil
+import subprocess
+import threading
+import time
+import logging
+from collections import deque
+from queue import Empty, Full, Queue
+
+import cv2
+import numpy as np
+
+from overlay import OverlayRenderer
+
+logger = logging.getLogger(__name__)
+
+QUEUE_FRAMES = 32
+IN_FLIGHT = 16
+DB_BATCH_ROWS = 2048
+PROGRESS_INTERVAL_S = 1.0
+POLL_INTERVAL_S = 0.5
+PROBE_TIMEOUT_S = 300
+_DONE = object()
+
+
+def keyframe_indices(path, fps):
+    """Frame indices of the keyframes in `path`, or None without ffprobe.
+
+    Reads packet flags only (no decoding), so it is quick even for
+    multi-hour files.
+    """
+    ffprobe = shutil.which("ffprobe")
+    if ffprobe is None:
+        return None
+    try:
+        output = subprocess.run([ffprobe, "-v", "error", "-select_streams", "v:0",
+                                 "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path],
+                                capture_output=True, text=True, timeout=PROBE_TIMEOUT_S, check=True).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"Cannot list keyframes of {path}: {e}")
+        return None
+    packets = []
+    for line in output.splitlines():
+        pts, _, flags = line.partition(",")
+        try:
+            packets.append((float(pts), "K" in flags))
+        except ValueError:
+            continue
+    if not packets:
+        return None
+    start = min(pts for pts, _ in packets)
+    return sorted({round((pts - start) * fps) for pts, key in packets if key})
+
+
+def plan_segments(total_frames, fps, workers, min_segment_s, keyframes=None):
+    """Split [0, total_frames) into up to `workers` (start, end) frame ranges.
+
+    Boundaries are moved to the nearest keyframe when `keyframes` is given,
+    so no worker decodes frames it does not keep; otherwise a worker's seek
+    costs at most one GOP of extra decoding. The last range is open-ended
+    (end None) because container frame counts are estimates.
+    """
+    count = min(workers, int(total_frames / (min_segment_s * fps))) if total_frames and fps else 1
+    if count <= 1:
+        return [(0, None)]
+    bounds = [round(total_frames * i / count) for i in range(1, count)]
+    if keyframes:
+        snapped = []
+        for bound in bounds:
+            i = bisect.bisect_left(keyframes, bound)
+            nearby = keyframes[max(0, i - 1):i + 1]
+            snapped.append(min(nearby, key=lambda k: abs(k - bound)))
+        bounds = snapped
+    edges = [0] + sorted({b for b in bounds if 0 < b < total_frames}) + [None]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _offer(queue, item, halt):
+    # put() that gives up once the pipeline is stopping
+    while not halt.is_set():
+        try:
+            queue.put(item, timeout=POLL_INTERVAL_S)
+            return True
+        except Full:
+            continue
+    return False
+
+
+def _decode_range(capture, segment, start, end, stride, fps, queue, halt):
+    index = start
+    while not halt.is_set() and (end is None or index < end):
+        if index % stride:
+            # Skipped frames are demuxed and decoded but never converted
+            if not capture.grab():
+                break
+        else:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            if not _offer(queue, ("frame", segment, index, index * 1000.0 / fps, frame), halt):
+                break
+        index += 1
+
+
+def _decode_segment(path, segment, start, end, stride, fps, queue, halt):
+    # Runs in a spawned process, one per segment of the recording
+    cv2.setNumThreads(1)
+    try:
+        capture = cv2.VideoCapture(path)
+        if not capture.isOpened():
+            raise ValueError(f"Cannot open video {path}")
+        try:
+            if start:
+                capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+            _decode_range(capture, segment, start, end, stride, fps, queue, halt)
+        finally:
+            capture.release()
+        _offer(queue, ("end", segment, None), halt)
+    except Exception as e:
+        _offer(queue, ("error", segment, f"Segment {segment} of {path}: {e}"), halt)
+    if halt.is_set():
+        # Do not block exit on frames nobody will read
+        queue.cancel_join_thread()
+
+
+class VideoPipeline:
+    """Whole-recording analysis as three overlapped stages.
+
+    A decode thread reads the file and keeps every `stride`-th frame; the
+    calling thread submits those to the model (`submit(img)` returns a
+    future, so up to IN_FLIGHT frames share batched forward passes); a
+    writer thread turns results into detection rows, handed to `write_rows`
+    in bulk, and optionally an annotated video at `output_path`. Stages are
+    joined by bounded queues, so memory does not grow with video length.
+    `on_progress(dict)` is called about once a second and at the end.
+
+    With `decode_workers` > 1, recordings longer than `segment_s` per
+    worker are split at keyframes and each segment is decoded by its own
+    spawned process, all feeding the same inference stage. Detections of
+    later segments are held back (as compact arrays, without the frames)
+    until the earlier ones are complete, so rows still reach `write_rows`
+    in timestamp order. Annotated output needs the frames themselves in
+    order and always uses a single decoder.
+    """
+
+    def __init__(self, path, submit, write_rows, sample_fps=5.0, output_path=None, on_progress=None,
+                 timeout=30.0, decode_workers=1, segment_s=60.0):
+        self.path = path
+        self.submit = submit
+        self.write_rows = write_rows
+        self.sample_fps = sample_fps
+        self.output_path = output_path
+        self.on_progress = on_progress
+        self.timeout = timeout
+        self.decode_workers = max(1, int(decode_workers))
+        self.segment_s = segment_s
+        self.source_fps = None
+        self.total_frames = None
+        self.stride = 1
+        self.segments = [(0, None)]
+        self._decoded = Queue(maxsize=QUEUE_FRAMES)
+        self._results = Queue(maxsize=QUEUE_FRAMES)
+        self._stop = threading.Event()
+        self._halt = self._stop
+        self._processes = []
+        self._error = None
+        self._counters = {"frames": 0, "detections": 0, "infested": 0, "not_infested": 0}
+        self._last_index = -1
+        self._started_at = None
+
+    def _open(self):
+        capture = cv2.VideoCapture(self.path)
+        if not capture.isOpened():
+            raise ValueError(f"Cannot open video {self.path}")
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        self.source_fps = fps if fps and fps < 1000 else 30.0
+        total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.total_frames = total if total > 0 else None
+        self.stride = max(1, round(self.source_fps / self.sample_fps)) if self.sample_fps > 0 else 1
+        return capture
+
+    def _plan(self):
+        if self.decode_workers <= 1 or self.output_path or not self.total_frames or mp.cpu_count() < 2:
+            return [(0, None)]
+        if self.total_frames < 2 * self.segment_s * self.source_fps:
+            return [(0, None)]
+        workers = min(self.decode_workers, mp.cpu_count())
+        return plan_segments(self.total_frames, self.source_fps, workers, self.segment_s,
+                             keyframe_indices(self.path, self.source_fps))
+
+    def _decode(self, capture):
+        try:
+            _decode_range(capture, 0, 0, None, self.stride, self.source_fps, self._decoded, self._halt)
+            _offer(self._decoded, ("end", 0, None), self._halt)
+        except Exception as e:
+            self._error = self._error or e
+            self._stop.set()
+        finally:
+            capture.release()
+
+    def _start_decoders(self, capture):
+        if len(self.segments) == 1:
+            decoder = threading.Thread(target=self._decode, args=(capture,), name="video-decode", daemon=True)
+            decoder.start()
+            return [decoder]
+        capture.release()
+        ctx = mp.get_context("spawn")
+        self._decoded = ctx.Queue(maxsize=QUEUE_FRAMES)
+        self._halt = ctx.Event()
+        self._processes = [ctx.Process(target=_decode_segment,
+                                       args=(self.path, i, start, end, self.stride, self.source_fps,
+                                             self._decoded, self._halt),
+                                       name=f"video-decode-{i}", daemon=True)
+                           for i, (start, end) in enumerate(self.segments)]
+        for process in self._processes:
+            process.start()
+        logger.info(f"Decoding {self.path} in {len(self.segments)} segments: {self.segments}")
+        return []
+
+    def _stop_decoders(self, threads):
+        self._stop.set()
+        self._halt.set()
+        for thread in threads:
+            thread.join()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    def _next_decoded(self):
+        while not self._stop.is_set():
+            try:
+                return self._decoded.get(timeout=POLL_INTERVAL_S)
+            except Empty:
+                if self._processes and not any(p.is_alive() for p in self._processes) and self._decoded.empty():
+                    raise RuntimeError(f"Video decoders for {self.path} exited unexpectedly")
+        return None
+
+    def _write(self):
+        renderer = OverlayRenderer() if self.output_path else None
+        writer = None
+        rows = []
+        head = 0  # segment whose detections are written now; later ones wait
+        held = {}  # segment -> [(index, timestamp_ms, w, h, data)]
+        ended = set()
+        last_progress = time.monotonic()
+        try:
+            while True:
+                item = self._results.get()
+                if item is _DONE:
+                    break
+                segment, index, timestamp_ms, frame, data = item
+                if index is None:
+                    ended.add(segment)
+                    while head in ended:
+                        head += 1
+                        for held_item in held.pop(head, ()):
+                            self._append_rows(rows, *held_item)
+                elif segment != head:
+                    h, w = frame.shape[:2]
+                    held.setdefault(segment, []).append((index, timestamp_ms, w, h, data))
+                else:
+                    h, w = frame.shape[:2]
+                    self._append_rows(rows, index, timestamp_ms, w, h, data)
+                    if renderer is not None:
+                        if writer is None:
+                            fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+                            writer = cv2.VideoWriter(self.output_path, fourcc, self.source_fps / self.stride, (w, h))
+                        writer.write(renderer.render(frame, data))
+                if index is not None:
+                    self._count(index, data)
+                if len(rows) >= DB_BATCH_ROWS:
+                    self.write_rows(rows)
+                    rows = []
+                if time.monotonic() - last_progress >= PROGRESS_INTERVAL_S:
+                    last_progress = time.monotonic()
+                    self._report()
+            self.write_rows(rows)
+        except Exception as e:
+            self._error = self._error or e
+            self._stop.set()
+            self._halt.set()
+            # Keep draining so the inference stage never blocks on a full queue
+            while self._results.get() is not _DONE:
+                pass
+        finally:
+            if writer is not None:
+                writer.release()
+
+    @staticmethod
+    def _append_rows(rows, index, timestamp_ms, w, h, data):
+        for x1, y1, x2, y2, conf, cls in data.tolist():
+            rows.append((index, timestamp_ms, int(cls), conf,
+                         (x1 + x2) / (2 * w), (y1 + y2) / (2 * h), (x2 - x1) / w, (y2 - y1) / h))
+
+    def _count(self, index, data):
+        infested = int(np.count_nonzero(data[:, 5] == 0))
+        self._last_index = max(self._last_index, index)
+        self._counters["frames"] += 1
+        self._counters["detections"] += len(data)
+        self._counters["infested"] += infested
+        self._counters["not_infested"] += len(data) - infested
+
+    def _position(self, done=False):
+        # Frames of video covered so far; segments run side by side, so
+        # count analyzed frames rather than the furthest index seen
+        if done or len(self.segments) == 1:
+            return self._last_index + 1
+        frames = self._counters["frames"] * self.stride
+        return min(frames, self.total_frames) if self.total_frames else frames
+
+    def _report(self, done=False):
+        if self.on_progress is None:
+            return
+        elapsed = time.monotonic() - self._started_at
+        position = self._position(done)
+        video_s = position / self.source_fps
+        progress = {
+            "frames": self._counters["frames"],
+            "position_s": round(video_s, 1),
+            "duration_s": round(self.total_frames / self.source_fps, 1) if self.total_frames else None,
+            "percent": 100.0 if done else
+            round(min(100.0, 100.0 * position / self.total_frames), 1) if self.total_frames else None,
+            "elapsed_s": round(elapsed, 1),
+            # Seconds of video analyzed per wall-clock second; above 1 is faster than real time
+            "speed": round(video_s / elapsed, 2) if elapsed > 0 else None,
+            "done": done
+        }
+        try:
+            self.on_progress(progress)
+        except Exception as e:
+            logger.error(f"Error reporting video progress: {e}")
+
+    def run(self):
+        """Process the whole file; returns a summary. Raises on failure."""
+        capture = self._open()
+        self.segments = self._plan()
+        self._started_at = time.monotonic()
+        writer = threading.Thread(target=self._write, name="video-write", daemon=True)
+        writer.start()
+        decoders = self._start_decoders(capture)
+
+        in_flight = deque()
+        remaining = len(self.segments)
+        try:
+            while remaining:
+                item = self._next_decoded()
+                if item is None:
+                    break
+                kind, segment, *payload = item
+                if kind == "frame":
+                    index, timestamp_ms, frame = payload
+                    in_flight.append((segment, index, timestamp_ms, frame, self.submit(frame)))
+                    if len(in_flight) >= IN_FLIGHT:
+                        self._collect(in_flight.popleft())
+                    continue
+                if kind == "error":
+                    raise RuntimeError(payload[0])
+                remaining -= 1
+                # End of a segment travels behind its last frame
+                in_flight.append((segment, None, None, None, None))
+            while in_flight and not self._stop.is_set():
+                self._collect(in_flight.popleft())
+        except Exception as e:
+            self._error = self._error or e
+        finally:
+            self._stop_decoders(decoders)
+            self._results.put(_DONE)
+            writer.join()
+
+        if self._error is not None:
+            raise self._error
+        self._report(done=True)
+        elapsed = time.monotonic() - self._started_at
+        video_s = (self._last_index + 1) / self.source_fps
+        return {
+            "path": self.path,
+            "output_path": self.output_path,
+            "source_fps": round(self.source_fps, 2),
+            "stride": self.stride,
+            "segments": len(self.segments),
+            **self._counters,
+            "duration_s": round(video_s, 1),
+            "elapsed_s": round(elapsed, 1),
+            "speed": round(video_s / elapsed, 2) if elapsed > 0 else None
+        }
+
+    def _collect(self, entry):
+        segment, index, timestamp_ms, frame, future = entry
+        data = future.result(timeout=self.timeout) if future is not None else None
+        self._results.put((segment, index, timestamp_ms, frame, data))
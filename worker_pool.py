@@ -0,0 +1,192 @@
+import multiprocessing as mp
+import os
+import time
+import logging
+from queue import Queue
+
+logger = logging.getLogger(__name__)
+
+WORKER_START_TIMEOUT_S = 120
+POLL_INTERVAL_S = 0.5
+
+
+def _worker_main(worker_id, backend_kwargs, threads, inter_threads, cv2_threads, conn):
+    # Runs in a spawned process: pin thread pools before the model is built
+    import cv2
+    import torch
+    from backends import load_backend
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(inter_threads)
+    except RuntimeError:
+        pass
+    cv2.setNumThreads(cv2_threads)
+
+    try:
+        backend = load_backend(threads=threads, **backend_kwargs)
+    except Exception as e:
+        conn.send(("error", f"Worker {worker_id} failed to load {backend_kwargs.get('weights')}: {e}"))
+        return
+    conn.send(("ready", backend.names))
+
+    while True:
+        try:
+            images = conn.recv()
+        except EOFError:
+            break
+        if images is None:
+            break
+        try:
+            conn.send(("ok", backend.predict(images)))
+        except Exception as e:
+            conn.send(("error", repr(e)))
+
+
+class WorkerCrashed(RuntimeError):
+    pass
+
+
+class _Worker:
+    def __init__(self, worker_id):
+        self.id = worker_id
+        self.process = None
+        self.conn = None
+        self.started_at = None
+        self.busy_seconds = 0.0
+        self.batches = 0
+        self.frames = 0
+        self.errors = 0
+        self.restarts = -1  # first start is not a restart
+
+    def stats(self):
+        uptime = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            "id": self.id,
+            "pid": self.process.pid if self.process else None,
+            "alive": bool(self.process and self.process.is_alive()),
+            "batches": self.batches,
+            "frames": self.frames,
+            "errors": self.errors,
+            "restarts": max(0, self.restarts),
+            "busy_seconds": round(self.busy_seconds, 3),
+            "utilization": self.busy_seconds / uptime if uptime > 0 else 0.0
+        }
+
+
+class InferencePool:
+    """N spawned processes, each holding its own inference backend.
+
+    `predict(images)` blocks the calling thread until an idle worker has run
+    the batch and returns one (N, 6) detections array per image. Crashed
+    workers are restarted transparently; the batch that was in flight fails.
+    """
+
+    def __init__(self, backend_kwargs, num_workers, threads=None, inter_threads=1, cv2_threads=1):
+        self.backend_kwargs = backend_kwargs
+        self.num_workers = max(1, int(num_workers))
+        self.threads = threads or max(1, (os.cpu_count() or 1) // self.num_workers)
+        self.inter_threads = max(1, inter_threads)
+        self.cv2_threads = cv2_threads
+        self.names = None
+        self._ctx = mp.get_context("spawn")
+        self._workers = [_Worker(i) for i in range(self.num_workers)]
+        self._idle = Queue()
+
+    @property
+    def concurrency(self):
+        return self.num_workers
+
+    def start(self):
+        for worker in self._workers:
+            self._spawn(worker)
+            self._idle.put(worker)
+        logger.info(f"Inference pool started: {self.num_workers} workers x {self.threads} threads")
+        return self
+
+    def _spawn(self, worker):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker.id, self.backend_kwargs, self.threads, self.inter_threads, self.cv2_threads, child_conn),
+            name=f"inference-worker-{worker.id}",
+            daemon=True)
+        process.start()
+        child_conn.close()
+
+        worker.process = process
+        worker.conn = parent_conn
+        worker.restarts += 1
+
+        status, payload = self._receive(worker, timeout=WORKER_START_TIMEOUT_S)
+        if status != "ready":
+            raise RuntimeError(payload)
+        self.names = payload
+        worker.started_at = time.monotonic()
+        worker.busy_seconds = 0.0
+
+    def _receive(self, worker, timeout=None):
+        deadline = time.monotonic() + timeout if timeout else None
+        while not worker.conn.poll(POLL_INTERVAL_S):
+            if not worker.process.is_alive():
+                raise WorkerCrashed(f"Inference worker {worker.id} exited with code {worker.process.exitcode}")
+            if deadline and time.monotonic() > deadline:
+                raise WorkerCrashed(f"Inference worker {worker.id} did not respond within {timeout}s")
+        try:
+            return worker.conn.recv()
+        except EOFError:
+            raise WorkerCrashed(f"Inference worker {worker.id} closed its pipe")
+
+    def _restart(self, worker):
+        logger.warning(f"Restarting inference worker {worker.id}")
+        try:
+            worker.conn.close()
+            if worker.process.is_alive():
+                worker.process.kill()
+            worker.process.join(timeout=5)
+        except Exception as e:
+            logger.error(f"Error cleaning up inference worker {worker.id}: {e}")
+        self._spawn(worker)
+
+    def predict(self, images):
+        worker = self._idle.get()
+        try:
+            start = time.monotonic()
+            worker.conn.send(images)
+            status, payload = self._receive(worker)
+            worker.busy_seconds += time.monotonic() - start
+            worker.batches += 1
+            if status != "ok":
+                worker.errors += 1
+                raise RuntimeError(payload)
+            worker.frames += len(images)
+            return payload
+        except (WorkerCrashed, BrokenPipeError, OSError):
+            worker.errors += 1
+            try:
+                self._restart(worker)
+            except Exception as e:
+                logger.error(f"Failed to restart inference worker {worker.id}: {e}")
+            raise
+        finally:
+            self._idle.put(worker)
+
+    def stats(self):
+        return {
+            "workers": self.num_workers,
+            "threads": self.threads,
+            "inter_threads": self.inter_threads,
+            "cv2_threads": self.cv2_threads,
+            "idle": self._idle.qsize(),
+            "per_worker": [worker.stats() for worker in self._workers]
+        }
+
+    def close(self):
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+                worker.process.join(timeout=5)
+            except Exception:
+                pass
+            if worker.process and worker.process.is_alive():
+                worker.process.kill()